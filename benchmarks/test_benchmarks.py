@@ -0,0 +1,230 @@
+"""Benchmarks of the instrumentation overhead and of the renderers.
+
+Run with `nox -s benchmark`, or:
+
+    pytest benchmarks --benchmark-only --benchmark-storage=benchmarks/results \
+        --benchmark-save=<name>
+
+Results are saved as JSON in benchmarks/results, which is not committed
+since timings depend on the machine. To compare a change with a baseline,
+save the baseline on the same machine before the change:
+
+    git stash && nox -s benchmark -- --benchmark-save=baseline && git stash pop
+    nox -s benchmark -- --benchmark-compare --benchmark-compare-fail=mean:10%
+
+`--benchmark-compare` compares with the last saved run, and fails if the
+mean of a benchmark is 10% slower. The memory used by each clock is saved
+in the `extra_info` of `test_memory_per_clock`. The collections do not
+render, their renderer being the no-op `AbstractRenderer`.
+"""
+import io
+import logging
+import tracemalloc
+
+import pytest
+
+from ticktock import clocks
+from ticktock.clocks import Clock, tick
+from ticktock.collection import ClockCollection
+from ticktock.renderers import AbstractRenderer, LoggingRenderer
+from ticktock.std import StandardRenderer
+from ticktock.timers import ticktock
+
+N_CLOCKS = [1, 100, 1_000, 10_000]
+# the number of call sites of a large instrumented codebase
+N_SITES = 100_000
+
+
+@pytest.fixture
+def collection():
+    return ClockCollection(renderer=AbstractRenderer(), period=1e9)
+
+
+def make_clocks(collection, n_clocks):
+    # the first tock of each clock would render all clocks otherwise
+    collection.start()
+    for i in range(n_clocks):
+        clock = Clock(collection=collection, frame_info=(f"module_{i}.py", i))
+        clock.tick()
+        clock.tock(frame_info=(f"module_{i}.py", i + 1))
+    collection.stop(flush=False)
+    return list(collection.clocks.values())
+
+
+@pytest.fixture(scope="module")
+def many_clocks():
+    collection = ClockCollection(renderer=AbstractRenderer(), period=1e9)
+    return collection, make_clocks(collection, N_SITES)
+
+
+def test_uninstrumented(benchmark):
+    def f():
+        pass
+
+    benchmark(f)
+
+
+def test_tick(benchmark, collection):
+    def f():
+        tick(collection=collection)
+
+    benchmark(f)
+
+
+def test_tick_tock(benchmark, collection):
+    def f():
+        t = tick(collection=collection)
+        t.tock()
+
+    benchmark(f)
+
+
+def test_decorator(benchmark, collection):
+    @ticktock(collection=collection)
+    def f():
+        pass
+
+    benchmark(f)
+
+
+def test_context_manager(benchmark, collection):
+    timer = ticktock(collection=collection)
+
+    def f():
+        with timer:
+            pass
+
+    benchmark(f)
+
+
+def test_disabled_collection(benchmark):
+    collection = ClockCollection(renderer=AbstractRenderer(), enabled=False)
+
+    def f():
+        t = tick(collection=collection)
+        t.tock()
+
+    benchmark(f)
+
+
+def test_disabled_at_import(benchmark, collection, monkeypatch):
+    monkeypatch.setattr(clocks, "_DISABLED", True)
+
+    @ticktock(collection=collection)
+    def f():
+        t = tick(collection=collection)
+        t.tock()
+
+    benchmark(f)
+
+
+def test_first_tock(benchmark):
+    # each round tocks a new clock, in a new collection
+
+    def setup():
+        collection = ClockCollection(renderer=AbstractRenderer(), period=1e9)
+        clock = Clock(collection=collection, frame_info=("module.py", 0))
+        clock.tick()
+        return (clock,), {}
+
+    def f(clock):
+        clock.tock(frame_info=("module.py", 1))
+
+    benchmark.pedantic(f, setup=setup, rounds=1000)
+
+
+def test_repeat_tock(benchmark, collection):
+    clock = Clock(collection=collection, frame_info=("module.py", 0))
+    clock.tick()
+    clock.tock(frame_info=("module.py", 1))
+
+    def f():
+        clock.tock(frame_info=("module.py", 1))
+
+    benchmark(f)
+
+
+def test_repeat_tock_many_sites(benchmark, many_clocks):
+    # each round tocks all sites once, in a collection that does not render
+    collection, clocks = many_clocks
+
+    def f():
+        for clock in clocks:
+            clock.tick()
+            clock.tock(frame_info=(clock.tick_filename, clock.tick_line + 1))
+
+    collection.start()
+    try:
+        benchmark.pedantic(f, rounds=5)
+    finally:
+        collection.stop(flush=False)
+
+
+@pytest.mark.parametrize("n_clocks", N_CLOCKS)
+def test_standard_renderer(benchmark, collection, n_clocks):
+    clocks = make_clocks(collection, n_clocks)
+
+    def setup():
+        return (StandardRenderer(out=io.StringIO()), clocks), {}
+
+    benchmark.pedantic(
+        lambda renderer, clocks: renderer.render(clocks), setup=setup, rounds=5
+    )
+
+
+@pytest.mark.parametrize("n_clocks", N_CLOCKS)
+def test_standard_renderer_unchanged(benchmark, collection, n_clocks):
+    clocks = make_clocks(collection, n_clocks)
+    renderer = StandardRenderer(out=io.StringIO())
+    renderer.render(clocks)
+
+    benchmark(renderer.render, clocks)
+
+
+@pytest.mark.parametrize("n_clocks", N_CLOCKS)
+def test_standard_renderer_one_changed(benchmark, collection, n_clocks):
+    # each round records new times in a single clock before rendering
+    clocks = make_clocks(collection, n_clocks)
+    renderer = StandardRenderer(out=io.StringIO())
+    renderer.render(clocks)
+    clock = clocks[0]
+
+    def f():
+        clock.tick()
+        clock.tock(frame_info=(clock.tick_filename, clock.tick_line + 1))
+        renderer.render(clocks)
+
+    collection.start()
+    try:
+        benchmark(f)
+    finally:
+        collection.stop(flush=False)
+
+
+@pytest.mark.parametrize("n_clocks", N_CLOCKS)
+def test_logging_renderer(benchmark, collection, n_clocks):
+    logger = logging.getLogger("ticktock.benchmarks")
+    logger.propagate = False
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    renderer = LoggingRenderer(logger=logger)
+    clocks = make_clocks(collection, n_clocks)
+
+    benchmark.pedantic(renderer.render, args=(clocks,), rounds=5)
+
+
+def test_memory_per_clock(benchmark):
+    n_clocks = N_SITES
+
+    def measure():
+        collection = ClockCollection(renderer=AbstractRenderer(), period=1e9)
+        tracemalloc.start()
+        try:
+            make_clocks(collection, n_clocks)
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return size / n_clocks
+
+    bytes_per_clock = benchmark.pedantic(measure, rounds=1)
+    benchmark.extra_info["bytes_per_clock"] = bytes_per_clock
@@ -32,3 +32,19 @@ def coverage(session):
         "docs/badges/coverage.svg",
     )
     session.run("genbadge", "tests", "-i", "junit.xml", "-o", "docs/badges/tests.svg")
+
+
+@nox.session(python=["3.9"])
+def benchmark(session):
+    # Run the benchmarks, saving the results in benchmarks/results and
+    # comparing them with the previous results if any.
+    session.install("-r", "requirements-dev.txt")
+    session.install(".")
+    args = [
+        "pytest",
+        "benchmarks",
+        "--benchmark-only",
+        "--benchmark-storage=benchmarks/results",
+        "--benchmark-autosave",
+    ]
+    session.run(*args, *session.posargs)
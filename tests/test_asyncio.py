@@ -0,0 +1,60 @@
+import asyncio
+import inspect
+
+from ticktock.timers import ticktock
+
+N_TASKS = 1000
+SLEEP_S = 0.01
+
+
+def loop_timer() -> int:
+    return int(asyncio.get_running_loop().time() * 1e9)
+
+
+def test_decorator_coroutine(fresh_clock_collection):
+    @ticktock(collection=fresh_clock_collection, timer=loop_timer)
+    async def f(x):
+        await asyncio.sleep(SLEEP_S)
+        return x
+
+    assert inspect.iscoroutinefunction(f)
+
+    async def main():
+        return await asyncio.gather(*(f(k) for k in range(N_TASKS)))
+
+    assert asyncio.run(main()) == list(range(N_TASKS))
+
+    clock = next(iter(fresh_clock_collection.clocks.values()))
+    assert clock.tick_name == "f"
+    times = next(iter(clock.times.values()))
+    assert times.count == N_TASKS
+    # interleaved tasks do not pair their tocks with other tasks' ticks
+    assert times.min_time_ns >= 0.9 * SLEEP_S * 1e9
+
+
+def test_decorator_coroutine_no_arguments(fresh_clock_collection):
+    @ticktock
+    async def f():
+        pass
+
+    assert inspect.iscoroutinefunction(f)
+    asyncio.run(f())
+
+
+def test_async_contextmanager(fresh_clock_collection):
+    timer = ticktock(collection=fresh_clock_collection, timer=loop_timer)
+
+    async def work():
+        async with timer:
+            await asyncio.sleep(SLEEP_S)
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(N_TASKS)))
+
+    asyncio.run(main())
+
+    assert len(fresh_clock_collection.clocks) == 1
+    clock = next(iter(fresh_clock_collection.clocks.values()))
+    times = next(iter(clock.times.values()))
+    assert times.count == N_TASKS
+    assert times.min_time_ns >= 0.9 * SLEEP_S * 1e9
@@ -1,6 +1,11 @@
+import threading
+import time
+import weakref
+
 from ticktock import collection as collection_mod
 from ticktock.clocks import tick
 from ticktock.collection import ClockCollection, disable, enable, set_collection
+from ticktock.renderers import AbstractRenderer
 from ticktock.std import FORMATS, StandardRenderer
 
 
@@ -44,3 +49,201 @@ def test_set_enable_disable(fresh_configuration, monkeypatch):
 
     enable()
     assert collection_mod._DEFAULT_COLLECTION._enabled
+
+
+class RecordingRenderer(AbstractRenderer):
+    def __init__(self) -> None:
+        self.threads = []
+        self.counts = []
+        self.rendered = threading.Event()
+
+    def render(self, render_data) -> None:
+        self.threads.append(threading.current_thread())
+        self.counts.append(
+            [times.count for clock in render_data for times in clock.times.values()]
+        )
+        self.rendered.set()
+
+
+def test_background_reporter(fresh_configuration):
+    renderer = RecordingRenderer()
+    collection = ClockCollection(period=0.01, renderer=renderer, background=True)
+    assert collection._reporter is not None
+    assert collection._reporter.daemon
+
+    for _ in range(5):
+        t = tick(collection=collection)
+        t.tock()
+    assert renderer.rendered.wait(5)
+    assert threading.main_thread() not in renderer.threads
+
+    collection.stop()
+    assert collection._reporter is None
+    assert renderer.threads[-1] is threading.main_thread()
+    assert renderer.counts[-1] == [5]
+
+    n_renders = len(renderer.threads)
+    t = tick(collection=collection)
+    t.tock()
+    # without the reporter, tocks render again
+    assert len(renderer.threads) == n_renders + 1
+
+
+def test_background_reporter_start_stop(fresh_configuration):
+    renderer = RecordingRenderer()
+    collection = ClockCollection(period=3600, renderer=renderer)
+    collection.start()
+    reporter = collection._reporter
+    collection.start()
+    assert collection._reporter is reporter
+
+    t = tick(collection=collection)
+    t.tock()
+    assert renderer.counts == []
+
+    collection.stop(flush=False)
+    assert not reporter.is_alive()
+    assert renderer.counts == []
+    collection.stop()
+    assert renderer.counts == []
+
+
+def test_collection_merge(fresh_configuration, constant_timer):
+    def run(collection, n):
+        for _ in range(n):
+            t = tick(name="run", collection=collection, timer=constant_timer)
+            t.tock()
+
+    def other_run(collection):
+        t = tick(collection=collection)
+        t.tock()
+
+    collection = ClockCollection(renderer=RecordingRenderer())
+    other = ClockCollection(renderer=RecordingRenderer())
+    run(collection, 3)
+    run(other, 4)
+    other_run(other)
+
+    collection.merge(other)
+    assert len(collection.clocks) == 2
+    clock = next(iter(collection.clocks.values()))
+    assert clock.tick_name == "run"
+    times = list(clock.times.values())
+    assert len(times) == 1
+    assert times[0].count == 7
+    assert times[0].histogram.total == 7
+
+    collection.merge(other)
+    assert list(clock.times.values())[0].count == 11
+    # the merged collection is not modified
+    assert list(next(iter(other.clocks.values())).times.values())[0].count == 4
+
+
+def test_final_update(fresh_configuration, monkeypatch, tmp_path):
+    collection = ClockCollection(renderer=RecordingRenderer())
+    monkeypatch.setattr(collection_mod, "_ALL_COLLECTIONS", [weakref.ref(collection)])
+    monkeypatch.setattr(collection_mod, "_running_in_pytest", lambda: False)
+    monkeypatch.setattr(collection_mod, "_SHUTDOWN_SINK", None)
+    monkeypatch.setattr(collection_mod, "_SHUTDOWN_TIMEOUT_S", 1.0)
+    t = tick(name="final", collection=collection)
+    t.tock()
+
+    collection_mod.final_update()
+    assert collection.renderer.counts[-1] == [1]
+
+    # the final rendering can go to another renderer, or to a file
+    renderer = RecordingRenderer()
+    collection_mod.set_shutdown(renderer)
+    collection_mod.final_update()
+    assert renderer.counts == [[1]]
+
+    path = tmp_path / "ticktock.log"
+    collection_mod.set_shutdown(str(path))
+    collection_mod.final_update()
+    collection_mod.final_update()
+    assert path.read_text().count("[final:") == 2
+
+    # a file that cannot be written is ignored
+    collection_mod.set_shutdown(str(tmp_path / "missing" / "ticktock.log"))
+    collection_mod.final_update()
+
+    # a renderer that blocks is abandoned at the end of the time budget
+    class BlockingRenderer(RecordingRenderer):
+        def render(self, render_data):
+            time.sleep(10)
+
+    collection_mod.set_shutdown(BlockingRenderer(), timeout=0.1)
+    start = time.perf_counter()
+    collection_mod.final_update()
+    assert time.perf_counter() - start < 1
+
+    # no collection is rendered once the time budget is exhausted
+    n_renders = len(collection.renderer.counts)
+    collection_mod.set_shutdown(timeout=0)
+    collection_mod.final_update()
+    assert len(collection.renderer.counts) == n_renders
+
+    # the rendering is done inline when no thread can be started
+    def start(self):
+        raise RuntimeError("can't create new thread at interpreter shutdown")
+
+    renderer = RecordingRenderer()
+    collection_mod.set_shutdown(renderer, timeout=1.0)
+    monkeypatch.setattr(threading.Thread, "start", start)
+    collection_mod.final_update()
+    assert renderer.counts == [[1]]
+
+
+def test_collection_to_numpy(fresh_configuration, constant_timer):
+    collection = ClockCollection(renderer=RecordingRenderer())
+    assert len(collection.to_numpy()) == 0
+    for _ in range(3):
+        t = tick(name="first", collection=collection, timer=constant_timer)
+        t.tock()
+    t = tick(name="second", collection=collection, timer=constant_timer)
+    t.tock()
+    t.tock("end")
+
+    snapshot = collection.to_numpy()
+    assert snapshot.dtype.names == (
+        "name",
+        "tick_filename",
+        "tick_line",
+        "tock_filename",
+        "tock_line",
+        "count",
+        "samples",
+        "mean",
+        "std",
+        "min",
+        "max",
+        "last",
+    )
+    assert list(snapshot["count"]) == [3, 1, 1]
+    assert snapshot["name"][0].startswith("first:")
+    assert snapshot["name"][2] == "second-end"
+    assert snapshot["tick_filename"][0] == __file__
+    assert snapshot["tock_line"][1] == snapshot["tock_line"][2] - 1
+    assert list(snapshot["mean"]) == [0, 0, 0]
+
+    df = collection.to_pandas()
+    assert list(df.columns) == list(snapshot.dtype.names)
+    assert list(df["name"]) == list(snapshot["name"])
+
+
+def test_collection_to_numpy_tick_file(
+    fresh_configuration, constant_timer, monkeypatch
+):
+    collection = ClockCollection(renderer=RecordingRenderer())
+    t = tick(collection=collection, timer=constant_timer)
+    for _ in range(3):
+        t.tock()
+        t.tock()
+
+    exists = []
+    monkeypatch.setattr("os.path.exists", lambda path: exists.append(path) or True)
+    snapshot = collection.to_numpy()
+    assert len(snapshot) == 2
+    assert all(name.startswith("test_collection.py:") for name in snapshot["name"])
+    # the file of the tick is looked up once per clock, not once per tock
+    assert exists == [__file__]
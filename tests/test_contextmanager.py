@@ -19,3 +19,31 @@ def test_contextmanager(fresh_clock_collection):
     assert len(fresh_clock_collection.clocks) == 1
     clock = next(iter(fresh_clock_collection.clocks.values()))
     assert next(StandardRenderer(format="{name}").render_times(clock)) == "name"
+
+
+def test_contextmanager_nested(fresh_clock_collection, incremental_timer):
+    def walk(depth):
+        with ticktock(collection=fresh_clock_collection, timer=incremental_timer):
+            if depth:
+                walk(depth - 1)
+
+    walk(1)
+    clock = next(iter(fresh_clock_collection.clocks.values()))
+    times = next(iter(clock.times.values()))
+    assert times.count == 2
+    assert times.min_time_ns == 1
+    assert times.max_time_ns == 3
+
+
+def test_contextmanager_context_size(fresh_clock_collection):
+    import contextvars
+
+    def run():
+        with ticktock(collection=fresh_clock_collection):
+            pass
+
+    run()
+    size = len(contextvars.copy_context())
+    for _ in range(1000):
+        run()
+    assert len(contextvars.copy_context()) == size
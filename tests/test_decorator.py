@@ -1,3 +1,5 @@
+import pytest
+
 from ticktock.collection import ClockCollection, set_collection
 from ticktock.std import StandardRenderer
 from ticktock.timers import ticktock
@@ -46,3 +48,65 @@ def test_decorator_no_arguments(fresh_clock_collection):
     assert next(StandardRenderer(format="{name}").render_times(clock)) == "f"
 
     set_collection(ClockCollection())
+
+
+@pytest.mark.parametrize(
+    "record_nested, count, avg_time_ns, min_time_ns, max_time_ns",
+    [(True, 3, 3, 1, 5), (False, 1, 5, 5, 5)],
+)
+def test_decorator_recursive(
+    record_nested,
+    count,
+    avg_time_ns,
+    min_time_ns,
+    max_time_ns,
+    fresh_clock_collection,
+    incremental_timer,
+):
+    @ticktock(
+        collection=fresh_clock_collection,
+        timer=incremental_timer,
+        record_nested=record_nested,
+    )
+    def f(n):
+        if n:
+            f(n - 1)
+
+    f(2)
+    clock = next(iter(fresh_clock_collection.clocks.values()))
+    times = next(iter(clock.times.values()))
+    assert times.count == count
+    assert times.avg_time_ns == avg_time_ns
+    assert times.min_time_ns == min_time_ns
+    assert times.max_time_ns == max_time_ns
+    assert clock._tick_time_ns is None
+
+
+def test_decorator_exception(fresh_clock_collection):
+    @ticktock(collection=fresh_clock_collection)
+    def f(n):
+        if n:
+            f(n - 1)
+        else:
+            raise ValueError
+
+    with pytest.raises(ValueError):
+        f(2)
+    clock = next(iter(fresh_clock_collection.clocks.values()))
+    assert clock._tick_time_ns is None
+    assert len(clock.times) == 0
+
+
+def test_decorator_disabled_at_import(fresh_clock_collection, monkeypatch):
+    from ticktock import clocks
+
+    monkeypatch.setattr(clocks, "_DISABLED", True)
+
+    def f():
+        return 1
+
+    assert ticktock(f) is f
+    assert ticktock(collection=fresh_clock_collection)(f) is f
+    with ticktock(collection=fresh_clock_collection):
+        pass
+    assert len(fresh_clock_collection.clocks) == 0
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+# the time spent importing the ticktock modules themselves must stay within
+# this factor of the time spent importing these standard library modules,
+# which are about twice as large, measured in the same interpreter
+IMPORT_BUDGET_FACTOR = 2.5
+REFERENCE_MODULES = ["argparse", "ipaddress", "fractions"]
+
+# modules that are only imported when a feature needs them
+LAZY_MODULES = ["tqdm", "psutil", "numpy", "pandas", "json"]
+
+
+def _import_ticktock(pycache):
+    # modules are loaded from their bytecode, as in installed packages
+    env = {**os.environ, "PYTHONPYCACHEPREFIX": str(pycache)}
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {', '.join(REFERENCE_MODULES)}; "
+            "import sys, ticktock; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    self_us = reference_us = 0
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, _, module = line[len("import time:") :].split("|")
+        module = module.strip()
+        if module.startswith("ticktock"):
+            self_us += int(self_time)
+        elif module in REFERENCE_MODULES:
+            reference_us += int(self_time)
+    return self_us / reference_us, out.stdout.split()
+
+
+def test_import_time(tmp_path):
+    # the first import writes the bytecode
+    _import_ticktock(tmp_path)
+    ratio, modules = min(_import_ticktock(tmp_path) for _ in range(3))
+    assert ratio < IMPORT_BUDGET_FACTOR
+    for module in LAZY_MODULES:
+        assert module not in modules
+
+
+def test_default_collection_lazy():
+    code = (
+        "import ticktock.collection as c; "
+        "assert '_DEFAULT_COLLECTION' not in vars(c); "
+        "t = ticktock.tick(); t.tock(); "
+        "assert vars(c)['_DEFAULT_COLLECTION'] is c.get_collection()"
+    )
+    subprocess.run(
+        [sys.executable, "-c", "import ticktock; " + code],
+        check=True,
+        capture_output=True,
+    )
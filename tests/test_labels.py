@@ -0,0 +1,116 @@
+import io
+
+from ticktock.clocks import tick
+from ticktock.collection import ClockCollection
+from ticktock.renderers import PrometheusRenderer
+from ticktock.std import StandardRenderer
+from ticktock.timers import ticktock
+
+
+def test_labels_tick_tock(constant_timer):
+    collection = ClockCollection(renderer=StandardRenderer(out=io.StringIO()))
+
+    def run(endpoint, status):
+        t = tick(collection=collection, timer=constant_timer, labels=endpoint)
+        t.tock(labels=status)
+
+    run({"endpoint": "/a"}, {"status": 200})
+    run({"endpoint": "/a"}, {"status": 200})
+    run({"endpoint": "/b"}, {"status": 200})
+    run({"endpoint": "/a"}, {"status": 404})
+    run(None, None)
+
+    (clock,) = collection.clocks.values()
+    assert sorted((times.labels, times.count) for times in clock.times.values()) == [
+        ((), 1),
+        ((("endpoint", "/a"), ("status", "200")), 2),
+        ((("endpoint", "/a"), ("status", "404")), 1),
+        ((("endpoint", "/b"), ("status", "200")), 1),
+    ]
+    # repeated labels are resolved from the cache of the clock
+    assert len(clock._labelled_tocks) == 3
+    assert len(clock._label_sets) == 3
+
+
+def test_labels_tock_override(constant_timer):
+    collection = ClockCollection(renderer=StandardRenderer(out=io.StringIO()))
+    t = tick(collection=collection, timer=constant_timer, labels={"a": 1, "b": 1})
+    t.tock(labels={"b": 2})
+    (clock,) = collection.clocks.values()
+    (times,) = clock.times.values()
+    assert times.labels == (("a", "1"), ("b", "2"))
+
+
+def test_labels_max_label_sets(constant_timer):
+    collection = ClockCollection(
+        renderer=StandardRenderer(out=io.StringIO()), max_label_sets=2
+    )
+    for user in range(5):
+        t = tick(collection=collection, timer=constant_timer)
+        t.tock(labels={"user": user})
+
+    (clock,) = collection.clocks.values()
+    assert sorted((times.labels, times.count) for times in clock.times.values()) == [
+        ((("user", "0"),), 1),
+        ((("user", "1"),), 1),
+        ((("user", "other"),), 3),
+    ]
+    # label sets beyond the limit are not memoized, only their label names
+    assert len(clock._labelled_tocks) == 2
+    ((tock_id, label_set),) = clock._overflow_tocks.values()
+    assert tock_id.endswith("{user=other}")
+    assert label_set == (("user", "other"),)
+
+
+def test_labels_contextmanager(constant_timer):
+    collection = ClockCollection(renderer=StandardRenderer(out=io.StringIO()))
+    for tenant in ["x", "y", "x"]:
+        with ticktock(
+            name="job",
+            collection=collection,
+            timer=constant_timer,
+            labels={"t": tenant},
+        ):
+            pass
+
+    (clock,) = collection.clocks.values()
+    assert sorted((times.labels, times.count) for times in clock.times.values()) == [
+        ((("t", "x"),), 2),
+        ((("t", "y"),), 1),
+    ]
+
+
+def test_labels_rendering(constant_timer):
+    out = io.StringIO()
+    collection = ClockCollection(
+        renderer=StandardRenderer(format="{name} [{labels}]", out=out, no_update=True)
+    )
+    t = tick(name="run", collection=collection, timer=constant_timer)
+    t.tock(name="end", labels={"endpoint": "/a", "batch": 8})
+    assert out.getvalue().splitlines() == [
+        "run-end{batch=8,endpoint=/a} [batch=8,endpoint=/a]"
+    ]
+
+    renderer = PrometheusRenderer()
+    collection.renderer = renderer
+    collection.update(force=True)
+    assert (
+        'ticktock_seconds_count{name="run-end",batch="8",endpoint="/a"} 1'
+        in renderer.exposition().splitlines()
+    )
+
+
+def test_labels_reserved_names(constant_timer):
+    renderer = PrometheusRenderer()
+    collection = ClockCollection(renderer=renderer)
+    t = tick(name="run", collection=collection, timer=constant_timer)
+    t.tock(labels={"name": "x", "quantile": "y", "1st": "z"})
+    (clock,) = collection.clocks.values()
+    (times,) = clock.times.values()
+    assert times.labels == (
+        ("1st", "z"),
+        ("label_name", "x"),
+        ("label_quantile", "y"),
+    )
+    last_line = renderer.exposition().splitlines()[-1]
+    assert last_line.endswith('",label_1st="z",label_name="x",label_quantile="y"} 1')
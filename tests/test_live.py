@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from ticktock.__main__ import format_live_file
+from ticktock.clocks import tick
+from ticktock.collection import ClockCollection
+from ticktock.live import LiveFileRenderer, read_live_file
+
+
+def test_live_file(tmp_path, incremental_timer):
+    path = str(tmp_path / "ticktock.live")
+    renderer = LiveFileRenderer(path, capacity=2)
+    collection = ClockCollection(renderer=renderer)
+    assert read_live_file(path)[1] == []
+
+    def run(n):
+        for _ in range(n):
+            t = tick(name="live", collection=collection, timer=incremental_timer)
+            t.tock()
+        collection.update(force=True)
+
+    run(3)
+    _, entries = read_live_file(path)
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry.name.startswith("live:")
+    assert entry.count == 3
+    assert entry.samples == 3
+    assert entry.mean == 1
+    assert entry.p99 == 1
+
+    # entries are updated in place
+    run(1)
+    t = tick(name="other", collection=collection, timer=incremental_timer)
+    t.tock()
+    collection.update(force=True)
+    _, entries = read_live_file(path)
+    assert [e.count for e in entries] == [4, 1]
+    assert entries[0].name == entry.name
+
+    # clocks beyond the capacity are dropped
+    t = tick(name="dropped", collection=collection, timer=incremental_timer)
+    t.tock()
+    collection.update(force=True)
+    assert len(read_live_file(path)[1]) == 2
+    renderer.close()
+
+
+def test_live_file_torn_read(tmp_path):
+    path = str(tmp_path / "ticktock.live")
+    renderer = LiveFileRenderer(path)
+    # a write in progress has an odd sequence number
+    renderer._mmap[16] += 1
+    with pytest.raises(RuntimeError):
+        read_live_file(path, retries=2)
+    renderer.close()
+
+
+def test_live_file_invalid(tmp_path):
+    path = tmp_path / "not.live"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        read_live_file(str(path))
+
+
+def test_top(tmp_path, constant_timer):
+    path = str(tmp_path / "ticktock.live")
+    collection = ClockCollection(renderer=LiveFileRenderer(path))
+    t = tick(name="top", collection=collection, timer=constant_timer)
+    t.tock()
+    collection.update(force=True)
+    assert "top:" in format_live_file(path).splitlines()[3]
+
+    out = subprocess.run(
+        [sys.executable, "-m", "ticktock", "top", path, "--once"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+    )
+    assert "top:" in out.stdout
@@ -0,0 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from ticktock.clocks import tick
+from ticktock.collection import ClockCollection
+from ticktock.processes import ProcessCollector, QueueRenderer, init_worker
+from ticktock.renderers import AbstractRenderer
+from ticktock.sampling import EveryN
+from ticktock.timers import ticktock
+
+N_TASKS = 50
+
+
+@ticktock(name="square")
+def square(x):
+    return x * x
+
+
+def test_process_pool():
+    collection = ClockCollection(renderer=AbstractRenderer())
+    with ProcessCollector(collection) as collector:
+        with ProcessPoolExecutor(
+            max_workers=2, initializer=init_worker, initargs=(collector.queue,)
+        ) as executor:
+            assert list(executor.map(square, range(N_TASKS))) == [
+                x * x for x in range(N_TASKS)
+            ]
+
+    assert len(collection.clocks) == 1
+    clock = next(iter(collection.clocks.values()))
+    assert clock.tick_name == "square"
+    assert 1 <= len(clock._shards) <= 2
+    times = list(clock.times.values())
+    assert len(times) == 1
+    assert times[0].count == N_TASKS
+    assert times[0].histogram.total == N_TASKS
+
+
+class ListQueue(list):
+    def put(self, item):
+        self.append(item)
+
+
+def test_queue_renderer_receive():
+    queue = ListQueue()
+    worker_collection = ClockCollection(renderer=QueueRenderer(queue))
+    for _ in range(3):
+        t = tick(name="work", collection=worker_collection)
+        t.tock()
+    # the first tock is sent, and then nothing until the times change
+    assert len(queue) == 1
+    worker_collection.update(force=True)
+    assert len(queue) == 2
+    worker_collection.update(force=True)
+    assert len(queue) == 2
+
+    collection = ClockCollection(renderer=AbstractRenderer())
+    collector = ProcessCollector(collection)
+    t = tick(name="work", collection=collection)
+    t.tock()
+
+    for message in queue:
+        collector.receive(*message)
+    # the same times from another process
+    collector.receive(-1, queue[-1][1])
+
+    worker_clock = next(iter(worker_collection.clocks.values()))
+    clocks = list(collection.clocks.values())
+    assert len(clocks) == 2
+    remote_clock = collection.clocks[worker_clock._tick_id]
+    assert remote_clock.tick_name == "work"
+    assert len(remote_clock._shards) == 2
+    assert next(iter(remote_clock.times.values())).count == 6
+
+
+def test_queue_renderer_sampling():
+    queue = ListQueue()
+    worker_collection = ClockCollection(
+        renderer=QueueRenderer(queue), sampler=EveryN(4), period=3600
+    )
+    for _ in range(8):
+        t = tick(name="work", collection=worker_collection)
+        t.tock()
+    worker_collection.update(force=True)
+
+    collection = ClockCollection(renderer=AbstractRenderer())
+    collector = ProcessCollector(collection)
+    for message in queue:
+        collector.receive(*message)
+
+    (clock,) = collection.clocks.values()
+    (shard,) = clock._shards
+    assert (shard.calls, shard.sampled) == (8, 2)
+    assert clock.sampling_factor == 4
+
+
+def test_queue_renderer_sampling_local_ticks():
+    queue = ListQueue()
+    worker_collection = ClockCollection(
+        renderer=QueueRenderer(queue), sampler=EveryN(10), period=3600
+    )
+
+    def run(collection):
+        for _ in range(1000):
+            t = tick(name="work", collection=collection)
+            t.tock()
+
+    run(worker_collection)
+    worker_collection.update(force=True)
+
+    # the clock is also ticked without sampling in this process
+    collection = ClockCollection(renderer=AbstractRenderer(), period=3600)
+    run(collection)
+    collector = ProcessCollector(collection)
+    for message in queue:
+        collector.receive(*message)
+
+    (clock,) = collection.clocks.values()
+    (times,) = clock.times.values()
+    assert times.count == 1100
+    assert round(times.count * clock.sampling_factor) == 2000
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from ticktock.clocks import tick
+from ticktock.collection import ClockCollection
+from ticktock.raw import RawSamples
+
+
+def test_raw_samples_ring():
+    raw = RawSamples(3)
+    assert len(raw) == 0
+    assert raw.slot("tick", "a") == 0
+    assert raw.slot("tick", "b") == 1
+    assert raw.slot("tick", "a") == 0
+    assert raw.slots == [("tick", "a"), ("tick", "b")]
+
+    raw.record(10, 1, 0)
+    raw.record(20, 2, 1)
+    samples = raw.to_numpy()
+    assert samples.dtype.names == ("tick_ns", "duration_ns", "slot")
+    assert list(samples["tick_ns"]) == [10, 20]
+    assert list(samples["slot"]) == [0, 1]
+
+    raw.record(30, 3, 0)
+    raw.record(40, 4, 0)
+    assert len(raw) == 3
+    assert list(raw.to_numpy()["tick_ns"]) == [40, 20, 30]
+    assert list(raw.to_numpy(ordered=True)["duration_ns"]) == [2, 3, 4]
+
+    raw.clear()
+    assert len(raw) == 0
+    assert raw.slots == []
+
+
+def test_raw_samples_zero_copy():
+    raw = RawSamples(4)
+    raw.record(1, 1, 0)
+    raw.record(2, 2, 0)
+    samples = raw.to_numpy()
+    raw.record(3, 3, 0)
+    raw._buffer[1] = 5
+    assert samples["duration_ns"][0] == 5
+
+
+def test_raw_samples_capacity():
+    with pytest.raises(ValueError):
+        RawSamples(0)
+
+
+def test_raw_samples_slots_threads():
+    samples = RawSamples(1)
+    barrier = threading.Barrier(8)
+
+    def assign():
+        barrier.wait()
+        for i in range(1000):
+            samples.slot(str(i), "")
+
+    threads = [threading.Thread(target=assign) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(samples.slots) == 1000
+    assert all(samples.slot(*key) == i for i, key in enumerate(samples.slots))
+
+
+def test_collection_raw(incremental_timer):
+    collection = ClockCollection(raw_capacity=100)
+    for _ in range(3):
+        t = tick(collection=collection, timer=incremental_timer)
+        t.tock()
+        t.tock()
+    samples = collection.raw.to_numpy()
+    assert len(samples) == 6
+    assert list(samples["duration_ns"]) == [1, 2] * 3
+    assert list(samples["slot"]) == [0, 1] * 3
+    clock = next(iter(collection.clocks.values()))
+    assert [tick_id for tick_id, _ in collection.raw.slots] == [clock._tick_id] * 2
+    assert [tock_id for _, tock_id in collection.raw.slots] == list(clock.times)
+
+    # raw samples are opt-in
+    assert ClockCollection().raw is None
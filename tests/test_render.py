@@ -1,16 +1,29 @@
 import difflib
+import gzip
+import io
+import json
 import logging
 import os
 import shutil
+import socket
 import tempfile
+import threading
+import urllib.error
+import urllib.request
 
 import pytest
 
 from tests import TEST_DIR
 from ticktock.clocks import tick
 from ticktock.collection import ClockCollection, set_collection, set_format
-from ticktock.renderers import LoggingRenderer, name_field_fn
-from ticktock.std import StandardRenderer
+from ticktock.renderers import (
+    JsonLinesRenderer,
+    LoggingRenderer,
+    PrometheusRenderer,
+    StatsdRenderer,
+    name_field_fn,
+)
+from ticktock.std import CLR, DOWN, UP, StandardRenderer
 
 
 def test_tick_filename_does_not_exist(fresh_clock_collection):
@@ -177,6 +190,8 @@ def test_log_rendering(caplog):
         assert hasattr(record, "std")
         assert hasattr(record, "min")
         assert hasattr(record, "max")
+        assert hasattr(record, "p50")
+        assert hasattr(record, "p99")
         assert hasattr(record, "count")
 
     collection = ClockCollection(
@@ -188,3 +203,312 @@ def test_log_rendering(caplog):
             # this will fail because standard loggers do not accept
             # extra as keyword arguments
             t.tock()
+
+
+def test_prometheus_rendering(constant_timer):
+    renderer = PrometheusRenderer()
+    collection = ClockCollection(renderer=renderer)
+    for _ in range(4):
+        t = tick(name='run "fast"', collection=collection, timer=constant_timer)
+        t.tock()
+
+    lines = renderer.exposition().splitlines()
+    assert lines[:2] == [
+        "# HELP ticktock_seconds Times measured by ticktock clocks.",
+        "# TYPE ticktock_seconds summary",
+    ]
+    # the renderer reads the clocks of the last render when scraped
+    assert len(lines) == 2 + 6
+    assert lines[2].startswith(r'ticktock_seconds{name="run \"fast\":')
+    assert lines[2].endswith('",quantile="0.5"} 0.0')
+    assert lines[-2].startswith("ticktock_seconds_sum{")
+    assert lines[-1].startswith("ticktock_seconds_count{")
+    assert lines[-1].endswith("} 4")
+
+
+def test_prometheus_server(constant_timer):
+    renderer = PrometheusRenderer()
+    port = renderer.serve(0)
+    try:
+        collection = ClockCollection(renderer=renderer)
+        t = tick(collection=collection, timer=constant_timer)
+        t.tock()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert response.read().decode() == renderer.exposition()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/other")
+    finally:
+        renderer.close()
+    assert renderer._server is None
+
+
+@pytest.fixture
+def udp_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(5)
+    yield sock
+    sock.close()
+
+
+def test_statsd_rendering(udp_socket, constant_timer):
+    renderer = StatsdRenderer(port=udp_socket.getsockname()[1], prefix="app")
+    collection = ClockCollection(renderer=renderer, period=3600)
+
+    def run(n):
+        for _ in range(n):
+            t = tick(name="run", collection=collection, timer=constant_timer)
+            t.tock()
+
+    run(3)
+    metrics = udp_socket.recv(65536).decode().splitlines()
+    assert len(metrics) == 5
+    assert metrics[0].startswith("app.run_")
+    assert metrics[0].endswith(".count:1|c")
+    assert metrics[1].endswith(".mean:0|g")
+    assert [m.rsplit(".", 1)[1] for m in metrics[2:]] == [
+        "p50:0|g",
+        "p90:0|g",
+        "p99:0|g",
+    ]
+
+    # counts are sent as deltas since the previous render
+    collection.update(force=True)
+    assert udp_socket.recv(65536).decode().splitlines()[0].endswith(".count:2|c")
+    collection.update(force=True)
+    metrics = udp_socket.recv(65536).decode().splitlines()
+    assert metrics[0].endswith(".count:0|c")
+    assert len(metrics) == 4
+    renderer.close()
+
+
+def test_statsd_rendering_batched(udp_socket, constant_timer):
+    renderer = StatsdRenderer(
+        port=udp_socket.getsockname()[1],
+        max_packet_size=200,
+        dogstatsd=True,
+        tags={"env": "test"},
+    )
+    collection = ClockCollection(renderer=renderer, period=3600)
+    t = tick(name="clock0", collection=collection, timer=constant_timer)
+    t.tock()
+    t = tick(name="clock1", collection=collection, timer=constant_timer)
+    t.tock()
+    t = tick(name="clock2", collection=collection, timer=constant_timer)
+    t.tock()
+    udp_socket.settimeout(0.1)
+
+    def receive_all():
+        packets = []
+        with pytest.raises(socket.timeout):
+            while True:
+                packets.append(udp_socket.recv(65536))
+        return packets
+
+    receive_all()
+    collection.update(force=True)
+    packets = receive_all()
+    assert len(packets) > 1
+    assert all(len(packet) <= 200 for packet in packets)
+    metrics = [m for packet in packets for m in packet.decode().splitlines()]
+    assert len(metrics) == 3 * 4
+    assert metrics[0].startswith("ticktock.count:0|c|#env:test,name:clock0_")
+    renderer.close()
+
+
+def test_statsd_resolve_once(udp_socket, constant_timer, monkeypatch):
+    calls = []
+    getaddrinfo = socket.getaddrinfo
+
+    def counting_getaddrinfo(*args, **kwargs):
+        calls.append(args)
+        return getaddrinfo(*args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", counting_getaddrinfo)
+    renderer = StatsdRenderer(port=udp_socket.getsockname()[1])
+    assert renderer.address == udp_socket.getsockname()
+    collection = ClockCollection(renderer=renderer, period=3600)
+    for _ in range(3):
+        t = tick(collection=collection, timer=constant_timer)
+        t.tock()
+        collection.update(force=True)
+        assert udp_socket.recv(65536)
+    assert len(calls) == 1
+    renderer.close()
+
+
+def test_statsd_no_agent(constant_timer):
+    # sending to a closed port does not raise
+    renderer = StatsdRenderer(port=9)
+    collection = ClockCollection(renderer=renderer)
+    for _ in range(3):
+        t = tick(collection=collection, timer=constant_timer)
+        t.tock()
+        collection.update(force=True)
+    renderer.close()
+
+
+def test_json_lines_rendering(tmp_path, constant_timer):
+    path = tmp_path / "clocks.jsonl"
+    renderer = JsonLinesRenderer(str(path))
+    collection = ClockCollection(renderer=renderer, period=3600)
+    t = tick(name="first", collection=collection, timer=constant_timer)
+    t.tock()
+    t = tick(name="second", collection=collection, timer=constant_timer)
+    t.tock()
+    renderer.close()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    # a line for each clock at each render
+    assert [record["name"].split(":")[0] for record in records] == [
+        "first",
+        "first",
+        "second",
+    ]
+    assert records[-1]["count"] == 1
+    assert records[-1]["mean"] == 0
+    assert records[-1]["time"] >= records[0]["time"]
+    assert ", " not in path.read_text()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_json_lines_rotation(tmp_path, constant_timer, compress):
+    path = tmp_path / "clocks.jsonl"
+    renderer = JsonLinesRenderer(
+        str(path), max_bytes=1000, backup_count=2, compress=compress
+    )
+    collection = ClockCollection(renderer=renderer, period=3600)
+    t = tick(collection=collection, timer=constant_timer)
+    t.tock()
+    for _ in range(6):
+        collection.update(force=True)
+    renderer.close()
+
+    suffix = ".gz" if compress else ""
+    assert sorted(os.listdir(tmp_path)) == [
+        "clocks.jsonl",
+        f"clocks.jsonl.1{suffix}",
+        f"clocks.jsonl.2{suffix}",
+    ]
+    for name in os.listdir(tmp_path):
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(tmp_path / name, "rt") as f:
+            lines = f.read().splitlines()
+        assert 1 <= len(lines) and len("\n".join(lines)) < 1000
+        assert all(json.loads(line)["count"] == 1 for line in lines)
+
+
+def test_json_lines_rotation_time(tmp_path, constant_timer):
+    path = tmp_path / "clocks.jsonl"
+    renderer = JsonLinesRenderer(str(path), rotate_every=0)
+    collection = ClockCollection(renderer=renderer, period=3600)
+    t = tick(collection=collection, timer=constant_timer)
+    t.tock()
+    collection.update(force=True)
+    renderer.close()
+    assert sorted(os.listdir(tmp_path)) == ["clocks.jsonl", "clocks.jsonl.1"]
+
+
+def test_incremental_rendering(constant_timer):
+    out = io.StringIO()
+    renderer = StandardRenderer(format="{name} {count}", out=out)
+    collection = ClockCollection(renderer=renderer, period=3600)
+
+    def run(name):
+        if name == "first":
+            t = tick(name="first", collection=collection, timer=constant_timer)
+        else:
+            t = tick(name="second", collection=collection, timer=constant_timer)
+        t.tock("end")
+
+    run("first")
+    run("first")
+    run("second")
+    output = out.getvalue()
+    # the line count changed, all lines are written
+    assert output.endswith(UP(1) + CLR + "first-end 2\n" + CLR + "second-end 1\n")
+
+    # only the lines that changed are rewritten
+    run("second")
+    collection.update(force=True)
+    assert (
+        out.getvalue()[len(output) :] == UP(1) + CLR + "second-end 2" + DOWN(1) + "\r"
+    )
+
+    # nothing is written when no clock changed
+    output = out.getvalue()
+    collection.update(force=True)
+    assert out.getvalue() == output
+
+
+def test_incremental_rendering_clear(constant_timer):
+    renderer = StandardRenderer(format="{name} {count}", out=io.StringIO())
+    collection = ClockCollection(renderer=renderer, period=3600)
+
+    def run(name):
+        if name == "first":
+            t = tick(name="first", collection=collection, timer=constant_timer)
+        else:
+            t = tick(name="second", collection=collection, timer=constant_timer)
+        t.tock("end")
+
+    run("first")
+    run("second")
+    assert len(renderer._lines) == 2
+    collection.clear()
+    run("first")
+    # the lines and formats of the cleared clocks are forgotten
+    assert len(renderer._lines) == 1
+    assert len(renderer._formatting_data[None].precomputed_format) == 1
+    assert renderer._printed == ["first-end 1"]
+
+    # the overhead changes when the collection is calibrated
+    renderer.set_format("{name} {overhead}")
+    assert renderer._formatting_data[None].volatile
+
+
+def test_incremental_rendering_threads(constant_timer, monkeypatch):
+    renderer = StandardRenderer(format="{name} {count}", out=io.StringIO())
+    collection = ClockCollection(renderer=renderer, period=3600)
+
+    def run():
+        t = tick(name="threads", collection=collection, timer=constant_timer)
+        t.tock("end")
+
+    run()
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    collection.update(force=True)
+
+    formatting_data = renderer._formatting_data[None]
+    n_renders = []
+    render = formatting_data.render
+    monkeypatch.setattr(
+        formatting_data,
+        "render",
+        lambda *args: n_renders.append(1) or render(*args),
+    )
+    # the times merged over the threads are not formatted again while unchanged
+    for _ in range(3):
+        collection.update(force=True)
+    assert n_renders == []
+    assert renderer._printed == ["threads-end 2"]
+
+
+def test_rendering_same_tock_site(constant_timer):
+    collection = ClockCollection(
+        renderer=StandardRenderer(format="{name}", out=io.StringIO())
+    )
+
+    def tock(clock):
+        clock.tock()
+
+    first = tick(name="first", collection=collection, timer=constant_timer)
+    second = tick(name="second", collection=collection, timer=constant_timer)
+    tock(first)
+    tock(second)
+    # the constant fields are cached per clock and tock
+    assert next(collection.renderer.render_times(first)).startswith("first:")
+    assert next(collection.renderer.render_times(second)).startswith("second:")
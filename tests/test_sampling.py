@@ -0,0 +1,136 @@
+import io
+import random
+
+import pytest
+
+from ticktock.clocks import tick
+from ticktock.collection import ClockCollection
+from ticktock.sampling import EveryN, MaxRate, Probabilistic
+from ticktock.std import StandardRenderer
+from ticktock.timers import ticktock
+
+N_TICKS = 100
+
+
+def run(collection, sampler=None, n=N_TICKS, **kwargs):
+    measured = []
+    for _ in range(n):
+        t = tick(collection=collection, sampler=sampler, **kwargs)
+        measured.append(t.tock())
+    return next(iter(collection.clocks.values())), measured
+
+
+def test_sampling_every_n(fresh_clock_collection, constant_timer):
+    clock, measured = run(fresh_clock_collection, EveryN(10), timer=constant_timer)
+    assert measured[:11] == [0] + [None] * 9 + [0]
+    assert sum(m is not None for m in measured) == 10
+
+    times = next(iter(clock.times.values()))
+    assert times.count == 10
+    assert clock.sampling_factor == 10
+    assert (
+        next(
+            StandardRenderer(format="{count} {samples} {sample_rate}").render_times(
+                clock
+            )
+        )
+        == f"{N_TICKS} 10 0.1"
+    )
+
+
+def test_sampling_probabilistic(fresh_clock_collection):
+    random.seed(0)
+    clock, measured = run(fresh_clock_collection, Probabilistic(0.2))
+    n_sampled = sum(m is not None for m in measured)
+    assert 0 < n_sampled < N_TICKS
+
+    times = next(iter(clock.times.values()))
+    assert times.count == n_sampled
+    assert round(times.count * clock.sampling_factor) == N_TICKS
+
+
+def test_sampling_max_rate(fresh_clock_collection):
+    clock, measured = run(fresh_clock_collection, MaxRate(5))
+    times = next(iter(clock.times.values()))
+    # the ticks may span two seconds
+    assert 5 <= times.count <= 10
+    assert round(times.count * clock.sampling_factor) == N_TICKS
+
+
+def test_sampling_collection():
+    collection = ClockCollection(sampler=EveryN(4))
+    clock, _ = run(collection, n=8)
+    assert next(iter(clock.times.values())).count == 2
+
+
+def test_sampling_collection_two_sites(constant_timer):
+    collection = ClockCollection(
+        renderer=StandardRenderer(out=io.StringIO()), sampler=EveryN(2)
+    )
+    for _ in range(100):
+        first = tick(collection=collection, timer=constant_timer)
+        first.tock()
+        second = tick(collection=collection, timer=constant_timer)
+        second.tock()
+
+    for clock in collection.clocks.values():
+        (times,) = clock.times.values()
+        assert times.count == 50
+        assert clock.sampling_factor == 2
+
+
+def test_sampling_nested(fresh_clock_collection, incremental_timer):
+    @ticktock(
+        collection=fresh_clock_collection,
+        timer=incremental_timer,
+        sampler=EveryN(2),
+    )
+    def f(n):
+        if n:
+            f(n - 1)
+
+    f(3)
+    clock = next(iter(fresh_clock_collection.clocks.values()))
+    assert clock._tick_time_ns is None
+    times = next(iter(clock.times.values()))
+    # the calls with n = 3 and n = 1 are measured
+    assert times.count == 2
+    assert times.min_time_ns == 1
+    assert times.max_time_ns == 3
+
+
+@pytest.mark.parametrize(
+    "sampler_class, arg", [(EveryN, 0), (Probabilistic, 0), (Probabilistic, 1.5)]
+)
+def test_sampling_invalid(sampler_class, arg):
+    with pytest.raises(ValueError):
+        sampler_class(arg)
+
+
+def sampled_and_unsampled(timer):
+    sampled = ClockCollection(renderer=StandardRenderer(out=io.StringIO()))
+    run(sampled, EveryN(10), n=1000, timer=timer)
+    unsampled = ClockCollection(renderer=StandardRenderer(out=io.StringIO()))
+    run(unsampled, n=1000, timer=timer)
+    return sampled, unsampled
+
+
+@pytest.mark.parametrize("order", ["sampled", "unsampled", "new"])
+def test_sampling_merge_unsampled(constant_timer, order):
+    sampled, unsampled = sampled_and_unsampled(constant_timer)
+    if order == "sampled":
+        collection = sampled
+        collection.merge(unsampled)
+    elif order == "unsampled":
+        collection = unsampled
+        collection.merge(sampled)
+    else:
+        collection = ClockCollection(renderer=StandardRenderer(out=io.StringIO()))
+        collection.merge(unsampled)
+        collection.merge(sampled)
+
+    # each shard is scaled by its own sampling factor
+    (clock,) = collection.clocks.values()
+    (times,) = clock.times.values()
+    assert times.count == 1100
+    assert round(times.count * clock.sampling_factor) == 2000
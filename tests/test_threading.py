@@ -0,0 +1,104 @@
+import logging
+import threading
+
+from ticktock.clocks import tick
+from ticktock.collection import ClockCollection
+from ticktock.renderers import LoggingRenderer
+from ticktock.std import StandardRenderer
+
+N_THREADS = 8
+N_TICKS = 2000
+
+
+def run_threads(target, n_threads=N_THREADS):
+    barrier = threading.Barrier(n_threads)
+
+    def run():
+        barrier.wait()
+        target()
+
+    threads = [
+        threading.Thread(target=run, name=f"worker-{k}") for k in range(n_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_threads_same_clock(fresh_clock_collection):
+    fresh_clock_collection._period = 3600
+
+    def work():
+        for _ in range(N_TICKS):
+            t = tick(collection=fresh_clock_collection)
+            t.tock()
+
+    run_threads(work)
+
+    assert len(fresh_clock_collection.clocks) == 1
+    clock = next(iter(fresh_clock_collection.clocks.values()))
+    assert len(clock._shards) == N_THREADS
+    times = list(clock.times.values())
+    assert len(times) == 1
+    assert times[0].count == N_THREADS * N_TICKS
+    assert times[0].min_time_ns >= 0
+
+
+def test_threads_tick_state_is_per_thread(fresh_clock_collection):
+    clock = tick(collection=fresh_clock_collection)
+    ticked = threading.Event()
+    tocked = threading.Event()
+
+    def other():
+        clock.tick()
+        ticked.set()
+        tocked.wait()
+        clock.tock()
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    ticked.wait()
+    # the other thread's tick does not overwrite this thread's tick time
+    assert clock._tick_time_ns is not None
+    main_tick_time_ns = clock._tick_time_ns
+    clock.tock()
+    tocked.set()
+    thread.join()
+    assert clock._tick_time_ns == main_tick_time_ns
+    assert sorted(times.count for times in clock.times.values()) == [1, 1]
+
+
+def test_render_per_thread():
+    collection = ClockCollection(renderer=StandardRenderer(format="{name}"))
+
+    def work():
+        t = tick(name="work", collection=collection)
+        t.tock("done")
+
+    run_threads(work, n_threads=2)
+    clock = next(iter(collection.clocks.values()))
+
+    assert list(StandardRenderer(format="{name}").render_times(clock)) == ["work-done"]
+    assert sorted(
+        StandardRenderer(format="{name} {count}", per_thread=True).render_times(clock)
+    ) == ["work-done @worker-0 1", "work-done @worker-1 1"]
+
+
+def test_log_rendering_per_thread(caplog):
+    collection = ClockCollection(
+        renderer=LoggingRenderer(level="DEBUG", per_thread=True), period=3600
+    )
+
+    def work():
+        t = tick(collection=collection)
+        t.tock()
+
+    run_threads(work, n_threads=2)
+    caplog.clear()
+    with caplog.at_level(logging.DEBUG):
+        collection.update(force=True)
+    assert sorted(record.thread_name for record in caplog.records) == [
+        "worker-0",
+        "worker-1",
+    ]
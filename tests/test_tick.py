@@ -1,5 +1,8 @@
+import contextvars
+
 import pytest
 
+from ticktock import clocks as clocks_module
 from ticktock import collection as collection_mod
 from ticktock.clocks import Clock, tick
 from ticktock.collection import clear_collection
@@ -129,3 +132,79 @@ def test_collection_disabled(fresh_clock_collection, incremental_timer):
 
     fresh_clock_collection.enable()
     assert clock.is_enabled()
+
+
+def test_tick_call_site_cache(fresh_clock_collection):
+    for _ in range(3):
+        t = tick(collection=fresh_clock_collection)
+        t.tock()
+
+    # one tick site and one tock site
+    assert len(fresh_clock_collection._call_sites) == 2
+    clock = next(iter(fresh_clock_collection.clocks.values()))
+    assert len(clock.times) == 1
+    assert next(iter(clock.times.values())).count == 3
+
+    fresh_clock_collection.clear()
+    assert len(fresh_clock_collection._call_sites) == 0
+
+
+def test_tick_stacklevel(fresh_clock_collection):
+    def start():
+        return tick(collection=fresh_clock_collection, stacklevel=2)
+
+    t = start()
+    t.tock()
+    clock = next(iter(fresh_clock_collection.clocks.values()))
+    assert clock.tick_filename == __file__
+    assert clock.tick_line == test_tick_stacklevel.__code__.co_firstlineno + 4
+
+
+def test_tick_nested(fresh_clock_collection, incremental_timer):
+    def start(nested):
+        return tick(
+            collection=fresh_clock_collection,
+            timer=incremental_timer,
+            nested=nested,
+        )
+
+    outer = start(nested=True)
+    inner = start(nested=True)
+    assert inner is outer
+    assert inner.tock(nested=True) == 1
+    assert outer.tock(nested=True) == 3
+    assert outer._tick_time_ns is None
+
+    # without nesting, ticks restart the current measurement
+    clock = start(nested=False)
+    start(nested=False)
+    assert clock.tock() == 1
+    assert clock.tock() == 2
+
+
+def test_tick_disabled_at_import(fresh_clock_collection, monkeypatch):
+    from ticktock import clocks
+
+    monkeypatch.setattr(clocks, "_DISABLED", True)
+    t = tick(collection=fresh_clock_collection)
+    assert t is clocks._NOOP_CLOCK
+    assert t.tock() is None
+    assert not t.is_enabled()
+    assert t.times == {}
+    assert len(fresh_clock_collection.clocks) == 0
+
+
+def test_tick_context_size(fresh_clock_collection):
+    def run():
+        t = tick(collection=fresh_clock_collection)
+        t.tock()
+        fresh_clock_collection.clear()
+
+    run()
+    size = len(contextvars.copy_context())
+    n_ticks = len(clocks_module._TICKS.get())
+    for _ in range(1000):
+        run()
+    # clocks share a single context variable, which only holds open ticks
+    assert len(contextvars.copy_context()) == size
+    assert len(clocks_module._TICKS.get()) == n_ticks
@@ -1,4 +1,11 @@
+import io
+import pickle
+import statistics
+
 from ticktock import tick
+from ticktock.collection import ClockCollection
+from ticktock.data import AggregateTimes
+from ticktock.std import StandardRenderer
 
 
 def test_timing_incremental(fresh_clock_collection, incremental_timer):
@@ -46,3 +53,218 @@ def test_timing_constant(fresh_clock_collection, constant_timer):
     assert second_timer.max_time_ns == 0
     assert second_timer.last_time_ns == 0
     assert second_timer.count == 10
+
+
+def aggregate(values):
+    times = AggregateTimes(
+        tock_name="",
+        tock_filename="",
+        tock_line=0,
+        avg_time_ns=values[0],
+        min_time_ns=values[0],
+        max_time_ns=values[0],
+        last_time_ns=values[0],
+    )
+    for v in values[1:]:
+        times.update(v, 0)
+    return times
+
+
+def test_timing_quantiles(fresh_clock_collection):
+    values = list(range(1, 10001))
+    times = aggregate(values)
+
+    for q in [0.5, 0.9, 0.99, 0.999]:
+        exact = values[int(q * len(values)) - 1]
+        assert abs(times.quantile(q) - exact) <= 0.07 * exact
+    assert times.quantile(0) == 1
+    assert times.quantile(1) == 10000
+
+    histogram = times.histogram
+    assert histogram.total == len(values)
+    assert len(histogram.counts) * histogram.counts.itemsize < 4096
+
+
+def test_timing_histogram_compact():
+    times = aggregate([1000, 1100, 1200])
+    # counters are only allocated between the smallest and largest buckets
+    assert len(times.histogram.counts) == 3
+    assert not hasattr(times, "__dict__")
+
+    other = aggregate([3, 10**6])
+    expected = aggregate([1000, 1100, 1200, 3, 10**6])
+    times.merge(other)
+    assert times.histogram == expected.histogram
+    assert pickle.loads(pickle.dumps(times)) == times
+    assert times.quantile(0.5) == expected.quantile(0.5)
+
+
+def test_timing_quantiles_small(fresh_clock_collection, constant_timer):
+    for _ in range(10):
+        t = tick(collection=fresh_clock_collection, timer=constant_timer)
+        t.tock()
+
+    clock = list(fresh_clock_collection.clocks.values())[0]
+    times = list(clock.times.values())[0]
+    assert times.quantile(0.5) == 0
+    assert times.quantile(0.999) == 0
+    assert (
+        next(StandardRenderer(format="{p50} {p90} {p99} {p999}").render_times(clock))
+        == "   "
+    )
+
+
+def test_timing_merge():
+    first = [3, 5, 8, 13, 400]
+    second = [1, 2, 21, 1000]
+
+    merged = aggregate(first)
+    other = aggregate(second)
+    copied = merged.copy()
+    merged.merge(other)
+    expected = aggregate(first + second)
+
+    assert merged.count == expected.count == 9
+    assert merged.avg_time_ns == statistics.mean(first + second)
+    assert abs(merged.std_time_ns - statistics.stdev(first + second)) < 1e-9
+    assert abs(merged._m2_time_ns - expected._m2_time_ns) < 1e-6
+    assert merged.min_time_ns == 1
+    assert merged.max_time_ns == 1000
+    assert merged.last_time_ns == 1000
+    assert merged.histogram == expected.histogram
+    assert merged.histogram.total == 9
+    for q in [0.1, 0.5, 0.9]:
+        assert merged.quantile(q) == expected.quantile(q)
+
+    # merging does not change other aggregates
+    assert other.count == 4
+    assert copied.count == 5
+    assert copied.histogram.total == 5
+
+
+def timed(value, tock_time_ns, window_ns=60):
+    return AggregateTimes(
+        tock_name="",
+        tock_filename="",
+        tock_line=0,
+        avg_time_ns=value,
+        min_time_ns=value,
+        max_time_ns=value,
+        last_time_ns=value,
+        last_tock_time_ns=tock_time_ns,
+        ewma_alpha=0.1,
+        window_ns=window_ns,
+    )
+
+
+def test_timing_window():
+    # a window of 60ns in 6 buckets of 10ns
+    times = timed(100, tock_time_ns=5)
+    times.update(15, 15 - 200)
+    assert times.window_count(20) == 2
+    assert times.window_mean(20) == 150
+    assert times.window_count(65) == 1
+    assert times.window_mean(65) == 200
+    assert times.window_count(70) == 0
+    assert times.window_mean(70) == 0
+
+    # old buckets are reused as the window slides
+    times.update(75, 75 - 300)
+    assert times.window_count(75) == 1
+    assert times.window_mean(75) == 300
+    assert times.count == 3
+
+    other = timed(400, tock_time_ns=76)
+    times.merge(other)
+    assert times.window_count(80) == 2
+    assert times.window_mean(80) == 350
+
+
+def test_timing_period_ewma():
+    times = timed(100, tock_time_ns=0)
+    assert times.period_count == 1
+    assert times.period_mean == 100
+    assert times.ewma_time_ns == 100
+
+    times.start_period()
+    assert times.period_count == 0
+    assert times.period_mean == 0
+    times.update(300, 0)
+    times.update(500, 0)
+    assert times.period_count == 2
+    assert times.period_mean == 400
+    assert times.ewma_time_ns == 100 + 0.1 * 200 + 0.1 * (500 - 120)
+
+
+def test_timing_period_render(incremental_timer):
+    out = io.StringIO()
+    collection = ClockCollection(
+        renderer=StandardRenderer(
+            format="{count_period} {count_window} {count}", out=out, no_update=True
+        ),
+        period=3600,
+        window=60,
+    )
+
+    def run(n):
+        for _ in range(n):
+            t = tick(collection=collection, timer=incremental_timer)
+            t.tock()
+        collection.update(force=True)
+
+    run(3)
+    run(1)
+    assert out.getvalue().splitlines() == ["1 1 1", "2 3 3", "1 4 4"]
+
+
+def test_timing_calibration(incremental_timer):
+    collection = ClockCollection(
+        renderer=StandardRenderer(format="{overhead}", out=io.StringIO())
+    )
+    assert collection.overhead_ns == 0
+    # an empty tick and tock call the timer twice
+    assert collection.calibrate(n=100, timer=incremental_timer) == 1
+    assert collection.overhead_ns == 1
+
+    t = tick(collection=collection, timer=incremental_timer)
+    assert t.tock() == 1
+    assert next(collection.renderer.render_times(t)) == "1ns"
+
+    collection.calibrate(n=100, timer=incremental_timer, subtract=True)
+    t = tick(collection=collection, timer=incremental_timer)
+    assert t.tock() == 0
+    assert t.tock() == 1
+    # the overhead is still subtracted after calibrating again
+    collection.calibrate(n=100, timer=incremental_timer)
+    t = tick(collection=collection, timer=incremental_timer)
+    assert t.tock() == 0
+
+    collection.calibrate(n=100, timer=incremental_timer, subtract=False)
+    t = tick(collection=collection, timer=incremental_timer)
+    assert t.tock() == 1
+
+
+def test_timing_calibration_default_timer():
+    collection = ClockCollection(subtract_overhead=True)
+    assert collection.overhead_ns > 0
+    assert collection._subtracted_overhead_ns == collection.overhead_ns
+
+
+def test_timing_window_ewma_disabled():
+    times = AggregateTimes(
+        tock_name="",
+        tock_filename="",
+        tock_line=0,
+        avg_time_ns=100,
+        min_time_ns=100,
+        max_time_ns=100,
+        last_time_ns=100,
+        last_tock_time_ns=5,
+    )
+    times.update(15, 15 - 200)
+    assert times.window_count(20) == 0
+    assert times.window_mean(20) == 0
+    assert times.ewma_time_ns == 0
+    times.merge(times.copy())
+    assert times.count == 4
+    assert times.ewma_time_ns == 0
@@ -0,0 +1,135 @@
+import asyncio
+import io
+
+import pytest
+
+from ticktock.clocks import tick
+from ticktock.collection import ClockCollection
+from ticktock.std import StandardRenderer
+from ticktock.timers import ticktock
+
+
+@pytest.fixture
+def tree_collection():
+    return ClockCollection(
+        renderer=StandardRenderer(out=io.StringIO(), no_update=True, tree=True),
+        tree=True,
+    )
+
+
+def test_tree_decorators(tree_collection, incremental_timer):
+    @ticktock(collection=tree_collection, timer=incremental_timer)
+    def child():
+        pass
+
+    @ticktock(collection=tree_collection, timer=incremental_timer)
+    def parent():
+        child()
+        child()
+
+    parent()
+    parent()
+    child()
+
+    root = tree_collection.tree.root
+    assert [(depth, node.name) for depth, node in root.walk()] == [
+        (0, "parent"),
+        (1, "child"),
+        (0, "child"),
+    ]
+    parent_node, child_node = root.children.values()
+    assert child_node.count == 1
+    assert parent_node.count == 2
+    # parent ticks at 1, child at 2-3 and 4-5, parent tocks at 6
+    assert parent_node.total_ns == 10
+    assert parent_node.self_ns == 6
+    (nested_child_node,) = parent_node.children.values()
+    assert nested_child_node.count == 4
+    assert nested_child_node.total_ns == 4
+    assert nested_child_node.self_ns == 4
+
+
+def test_tree_tick_tock(tree_collection, incremental_timer):
+    def run():
+        outer = tick(name="outer", collection=tree_collection, timer=incremental_timer)
+        for _ in range(3):
+            inner = tick(
+                name="inner", collection=tree_collection, timer=incremental_timer
+            )
+            inner.tock()
+        outer.tock()
+
+    run()
+    assert [
+        (depth, node.name, node.count, node.total_ns, node.self_ns)
+        for depth, node in tree_collection.tree.root.walk()
+    ] == [(0, "outer", 1, 7, 4), (1, "inner", 3, 3, 3)]
+
+
+def test_tree_exception(tree_collection, incremental_timer):
+    @ticktock(collection=tree_collection, timer=incremental_timer)
+    def failing():
+        raise ValueError
+
+    @ticktock(collection=tree_collection, timer=incremental_timer)
+    def parent():
+        try:
+            failing()
+        except ValueError:
+            pass
+
+    parent()
+    parent()
+    (parent_node,) = tree_collection.tree.root.children.values()
+    assert parent_node.count == 2
+    assert parent_node.self_ns == parent_node.total_ns
+    (failing_node,) = parent_node.children.values()
+    assert failing_node.count == 0
+
+
+def test_tree_asyncio(tree_collection):
+    @ticktock(collection=tree_collection)
+    async def child():
+        await asyncio.sleep(0.01)
+
+    @ticktock(collection=tree_collection)
+    async def parent():
+        await asyncio.gather(child(), child())
+
+    async def main():
+        await asyncio.gather(parent(), child())
+
+    asyncio.run(main())
+    root = tree_collection.tree.root
+    assert [(depth, node.name, node.count) for depth, node in root.walk()] == [
+        (0, "parent", 1),
+        (1, "child", 2),
+        (0, "child", 1),
+    ]
+    (parent_node, _) = root.children.values()
+    assert 0 <= parent_node.self_ns <= parent_node.total_ns
+
+
+def test_tree_render(tree_collection, incremental_timer):
+    @ticktock(collection=tree_collection, timer=incremental_timer)
+    def child():
+        pass
+
+    @ticktock(collection=tree_collection, timer=incremental_timer)
+    def parent():
+        child()
+
+    parent()
+    out = tree_collection.renderer._out = io.StringIO()
+    tree_collection.update(force=True)
+    assert out.getvalue().splitlines() == [
+        "⏱️ [parent] 3ns total, 2ns self, count=1",
+        "⏱️   [child] 1ns total, 1ns self, count=1",
+    ]
+
+
+def test_tree_disabled():
+    collection = ClockCollection(renderer=StandardRenderer(out=io.StringIO()))
+    t = tick(collection=collection)
+    t.tock()
+    assert collection.tree is None
@@ -1,6 +1,12 @@
 # flake8: noqa: F401
 from ticktock.clocks import tick
-from ticktock.collection import disable, enable, set_format, set_period
+from ticktock.collection import (
+    disable,
+    enable,
+    set_format,
+    set_period,
+    set_shutdown,
+)
 from ticktock.timers import ticktock
 
 __version__ = "0.1.2"
@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+from typing import List, Optional, TextIO
+
+from ticktock.live import read_live_file
+from ticktock.utils import format_ns_interval
+
+COLUMNS = ["count", "mean", "std", "min", "max", "p50", "p99"]
+
+
+def format_live_file(path: str, max_terms: int = 2) -> str:
+    updated_at, entries = read_live_file(path)
+    rows = [["name"] + COLUMNS]
+    for entry in entries:
+        rows.append(
+            [entry.name, str(entry.count)]
+            + [
+                format_ns_interval(getattr(entry, column), max_terms=max_terms)
+                for column in COLUMNS[1:]
+            ]
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = [f"{path} updated {time.time() - updated_at:.1f}s ago", ""] + [
+        "  ".join(
+            value.ljust(width) if i == 0 else value.rjust(width)
+            for i, (value, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def top(path: str, interval: float, once: bool, out: TextIO = sys.stdout) -> None:
+    while True:
+        text = format_live_file(path)
+        if once:
+            out.write(text)
+            return
+        # clear the screen before each refresh
+        out.write("\x1B[H\x1B[2J" + text)
+        out.flush()
+        time.sleep(interval)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m ticktock")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    top_parser = subparsers.add_parser(
+        "top", help="show the clocks of a file written by a LiveFileRenderer"
+    )
+    top_parser.add_argument("file")
+    top_parser.add_argument(
+        "-n", "--interval", type=float, default=1.0, help="refresh period in seconds"
+    )
+    top_parser.add_argument(
+        "--once", action="store_true", help="print the clocks once and exit"
+    )
+    args = parser.parse_args(argv)
+    try:
+        top(args.file, args.interval, args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,88 @@
 import logging
+import threading
 import time
-from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple, Union
+from contextvars import ContextVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 if TYPE_CHECKING:
     from ticktock.collection import ClockCollection
 
 from ticktock import collection as collection_module
-from ticktock.data import AggregateTimes
-from ticktock.utils import _TockName, get_frame_info, value_from_env
+from ticktock.data import AggregateTimes, TimesShard
+from ticktock.sampling import Sampler
+from ticktock.utils import (
+    OTHER_LABEL,
+    RESERVED_LABELS,
+    LabelSet,
+    _TockName,
+    format_labels,
+    get_call_site,
+    get_frame_info,
+    value_from_env,
+)
 
 logger = logging.getLogger("ticktock.clocks")
 
+# When TICKTOCK_DISABLE is set at import time, `tick` returns a no-op clock
+# without inspecting frames, and the decorator leaves functions unchanged
+_DISABLED = value_from_env("TICKTOCK_DISABLE", False)
+
+# (tick_time_ns, parent, labels) of an activation of a clock, the parent being
+# the enclosing activation of the same clock. Ticks that are not sampled have
+# a tick_time_ns of None
+_TickStack = Tuple[Optional[int], Any, LabelSet]
+
+# The activations of the clocks ticked and not tocked yet, kept per thread and
+# per asyncio task so that nested ticks of the same clock pair with their own
+# tocks. A single variable is shared by all clocks, so that ticking them does
+# not grow the context. The mapping is copied on each change, as it can be
+# shared with the tasks created since, and it only holds open activations,
+# so that it stays small.
+_TICKS: ContextVar[Dict["Clock", _TickStack]] = ContextVar("ticktock:ticks", default={})
+
+
+def _set_tick_stack(
+    ticks: Dict["Clock", _TickStack], clock: "Clock", stack: Optional[_TickStack]
+) -> None:
+    ticks = ticks.copy()
+    if stack is None:
+        ticks.pop(clock, None)
+    else:
+        ticks[clock] = stack
+    _TICKS.set(ticks)
+
 
 class Clock:
+    # clocks have no __dict__, as large codebases can have many of them
+    __slots__ = (
+        "tick_filename",
+        "tick_line",
+        "_tick_id",
+        "tick_name",
+        "_timer",
+        "_shards",
+        "_merged_shard",
+        "_raw_slots",
+        "_labelled_tocks",
+        "_label_sets",
+        "_overflow_tocks",
+        "_record_nested",
+        "_enabled",
+        "collection",
+        "_sampler",
+    )
+
     def __init__(
         self,
         name: str = "",
@@ -21,6 +91,8 @@ class Clock:
         enabled: Optional[bool] = None,
         collection: Optional["ClockCollection"] = None,
         frame_info: Optional[Tuple[str, int]] = None,
+        record_nested: bool = True,
+        sampler: Optional[Sampler] = None,
     ) -> None:
         self.tick_filename, self.tick_line = frame_info or get_frame_info(1)
         self._tick_id = f"{self.tick_filename}:{self.tick_line}"
@@ -28,45 +100,248 @@ class Clock:
         self.tick_name = name
 
         self._timer = timer or time.perf_counter_ns
-        self._tick_time_ns: Optional[int] = None
+        # aggregates are kept per thread, so that threads ticking the same
+        # clock never share state on the hot path, see `_new_shard`
+        self._shards: List[TimesShard] = []
+        self._merged_shard: Optional[TimesShard] = None
+        # slots of the tocks of this clock in the raw samples of the collection,
+        # created on the first tock with raw samples
+        self._raw_slots: Optional[Dict[str, int]] = None
+        # the tock id and labels of the (tock_id, tick labels, tock labels)
+        # of each labelled tock, and the distinct label sets of this clock,
+        # created on the first labelled tock
+        self._labelled_tocks: Optional[
+            Dict[Tuple[str, Any, Any], Tuple[str, LabelSet]]
+        ] = None
+        self._label_sets: Set[LabelSet]
+        # the tock id and labels of the (tock_id, tick label names, tock label
+        # names) of the tocks beyond `max_label_sets`, created on the first one
+        self._overflow_tocks: Dict[Tuple[str, Any, Any], Tuple[str, LabelSet]]
+        self._record_nested = record_nested
 
         self._enabled = enabled
         if self._enabled is None:
             self._enabled = not value_from_env("TICKTOCK_DISABLE", False)
 
-        self.times: Dict[str, AggregateTimes] = {}
-
         self.collection: "ClockCollection" = (
             collection or collection_module._DEFAULT_COLLECTION
         )
         self.collection.clocks[self._tick_id] = self
+        # samplers are stateful, each clock has its own
+        self._sampler = sampler or (
+            self.collection.sampler.copy()
+            if self.collection.sampler is not None
+            else None
+        )
 
         if format:
             self.collection.set_format(format, tick_id=self._tick_id)
 
-    def tick(self) -> "Clock":
+    @property
+    def _tick_time_ns(self) -> Optional[int]:
+        stack = _TICKS.get().get(self)
+        if stack is None:
+            shard = getattr(self.collection._local, "shards", {}).get(self)
+            stack = shard.last_tick if shard is not None else None
+        return stack[0] if stack else None
+
+    @property
+    def times(self) -> Dict[str, AggregateTimes]:
+        """Aggregated times of each tock, merged over all threads."""
+        shards = list(self._shards)
+        if len(shards) == 1:
+            return shards[0].times
+        times: Dict[str, AggregateTimes] = {}
+        copied = set()
+        for shard in shards:
+            for tock_id, shard_times in list(shard.times.items()):
+                if tock_id not in times:
+                    times[tock_id] = shard_times
+                    continue
+                if tock_id not in copied:
+                    times[tock_id] = times[tock_id].copy()
+                    copied.add(tock_id)
+                times[tock_id].merge(shard_times)
+        return times
+
+    def merge(self, other: "Clock") -> None:
+        """Add the times of `other`, a clock with the same tick id."""
+        if self._merged_shard is None:
+            self._merged_shard = TimesShard(thread_name="merged")
+            self._shards.append(self._merged_shard)
+        merged_shard = self._merged_shard
+        merged = merged_shard.times
+        other_times = other.times
+        # the merged shard counts the merged times as its measured ticks, and
+        # their estimated number as its ticks
+        count = sum(times.count for times in list(other_times.values()))
+        sampling_factor = other.sampling_factor
+        if sampling_factor != 1.0 or merged_shard.sampled:
+            if not merged_shard.sampled:
+                # the times merged so far are exact
+                merged_shard.calls = merged_shard.sampled = sum(
+                    times.count for times in list(merged.values())
+                )
+            merged_shard.calls += round(count * sampling_factor)
+            merged_shard.sampled += count
+        for tock_id, times in list(other_times.items()):
+            if tock_id in merged:
+                merged[tock_id].merge(times)
+            else:
+                merged[tock_id] = times.copy()
+
+    @property
+    def sampling_factor(self) -> float:
+        """The number of ticks for each measured tick.
+
+        The times of each shard are scaled by the ratio of its ticks to its
+        measured ticks, shards without sampling being exact, and the factor
+        is the ratio of the scaled times to the measured times.
+        """
+        shards = list(self._shards)
+        if not any(shard.sampled for shard in shards):
+            return 1.0
+        measured = estimated = 0.0
+        for shard in shards:
+            count = sum(times.count for times in list(shard.times.values()))
+            measured += count
+            estimated += count * shard.calls / shard.sampled if shard.sampled else count
+        if not measured:
+            # no times yet, the factor of the ticks
+            calls = sum(shard.calls for shard in shards)
+            return calls / sum(shard.sampled for shard in shards)
+        return estimated / measured
+
+    def thread_times(self) -> Iterator[Tuple[str, str, AggregateTimes]]:
+        """Iterate over the `(thread_name, tock_id, times)` of each thread."""
+        for shard in list(self._shards):
+            for tock_id, times in list(shard.times.items()):
+                yield shard.thread_name, tock_id, times
+
+    def _new_shard(self) -> TimesShard:
+        # the shards of the current thread are kept by the collection, keyed
+        # by clock, rather than in a thread local per clock
+        local = self.collection._local
+        try:
+            shards = local.shards
+        except AttributeError:
+            shards = local.shards = {}
+        shard = shards[self] = TimesShard(thread_name=threading.current_thread().name)
+        # list.append is atomic, no lock is needed to register the shard
+        self._shards.append(shard)
+        return shard
+
+    def tick(
+        self, nested: bool = False, labels: Optional[Dict[str, Any]] = None
+    ) -> "Clock":
+        """Start a measurement.
+
+        With `nested`, the tick opens a new activation of the clock, which is
+        closed by a `tock` with `nested` as well. Otherwise it restarts the
+        current activation.
+
+        The times are recorded with `labels`, along with those of the tock.
+        """
         if self.is_enabled():
-            self._tick_time_ns = self._timer()
+            ticks = _TICKS.get()
+            stack = ticks.get(self)
+            parent = stack if nested or stack is None else stack[1]
+            label_items = tuple(labels.items()) if labels else ()
+            if self._sampler is not None:
+                try:
+                    shard = self.collection._local.shards[self]
+                except (AttributeError, KeyError):
+                    shard = self._new_shard()
+                shard.calls += 1
+                if not self._sampler():
+                    _set_tick_stack(ticks, self, (None, parent, label_items))
+                    return self
+                shard.sampled += 1
+            tree = self.collection.tree
+            if tree is not None:
+                tree.enter(self, nested)
+            _TICKS.set({**ticks, self: (self._timer(), parent, label_items)})
         return self
 
     def tock(
         self,
         name: Union[str, _TockName] = "",
         frame_info: Optional[Tuple[str, int]] = None,
+        stacklevel: int = 1,
+        nested: bool = False,
+        labels: Optional[Dict[str, Any]] = None,
     ) -> Optional[float]:
+        """Record the time since the last tick.
+
+        With `nested`, the tock closes the innermost activation opened by a
+        `tick(nested=True)`. Activations enclosed in another activation of the
+        same clock are only recorded if the clock has `record_nested` set.
+
+        Times are aggregated separately for each set of `labels` of the tick
+        and the tock, up to `max_label_sets` of the collection per clock.
+
+        Returns the measured time, or None if the clock is disabled or the
+        tick was not sampled.
+        """
         if not self.is_enabled():
             return None
+        try:
+            shard = self.collection._local.shards[self]
+        except (AttributeError, KeyError):
+            shard = self._new_shard()
+        ticks = _TICKS.get()
+        stack = ticks.get(self)
+        if stack is None:
+            # tocks without a new tick measure from the last tick
+            stack = None if nested else shard.last_tick
+            if stack is None:
+                raise ValueError(f"Clock {self.tick_name} was not ticked.")
+        elif nested:
+            _set_tick_stack(ticks, self, stack[1])
+        elif stack[1] is None:
+            # the activation is closed, further tocks of this thread measure
+            # from its tick
+            if len(ticks) == 1:
+                _TICKS.set({})
+            else:
+                _set_tick_stack(ticks, self, None)
+            shard.last_tick = stack
+        tick_time_ns, parent, tick_labels = stack
+        if tick_time_ns is None:
+            return None
         tock_time_ns = self._timer()
-        tock_id = "{}:{}".format(*(frame_info or get_frame_info(1)))
-        if self._tick_time_ns is None:
-            raise ValueError(f"Clock {self.tick_name} was not ticked.")
-        if tock_id in self.times:
-            self.times[tock_id].update(tock_time_ns, self._tick_time_ns)
-            self.collection.update(force=False)
+        overhead_ns = self.collection._subtracted_overhead_ns
+        if overhead_ns:
+            tick_time_ns = min(tick_time_ns + overhead_ns, tock_time_ns)
+        tock_id, tock_filename, tock_line = get_call_site(
+            self.collection._call_sites, frame_info, stacklevel
+        )
+        if labels or tick_labels:
+            tock_id, label_set = self._labelled_tock(tock_id, tick_labels, labels)
+        else:
+            label_set = ()
+        dt = tock_time_ns - tick_time_ns
+        tree = self.collection.tree
+        if tree is not None:
+            tree.exit(self, dt)
+        if nested and parent is not None and not self._record_nested:
+            return dt
+        raw = self.collection.raw
+        if raw is not None:
+            raw_slots = self._raw_slots
+            if raw_slots is None:
+                raw_slots = self._raw_slots = {}
+            slot = raw_slots.get(tock_id)
+            if slot is None:
+                slot = raw_slots[tock_id] = raw.slot(self._tick_id, tock_id)
+            raw.record(tick_time_ns, dt, slot)
+        times = shard.times
+        if tock_id in times:
+            times[tock_id].update(tock_time_ns, tick_time_ns)
+            if self.collection._reporter is None:
+                self.collection.update(force=False)
         else:
-            dt = tock_time_ns - self._tick_time_ns
-            tock_filename, tock_line = frame_info or get_frame_info(1)
-            self.times[tock_id] = AggregateTimes(
+            times[tock_id] = AggregateTimes(
                 tock_name=name,
                 tock_line=tock_line,
                 tock_filename=tock_filename,
@@ -74,9 +349,78 @@ class Clock:
                 avg_time_ns=dt,
                 min_time_ns=dt,
                 max_time_ns=dt,
+                last_tock_time_ns=tock_time_ns,
+                ewma_alpha=self.collection._ewma_alpha,
+                window_ns=self.collection._window_ns,
+                labels=label_set,
             )
-            self.collection.update(force=True)
-        return tock_time_ns - self._tick_time_ns
+            if self.collection._reporter is None:
+                self.collection.update(force=True)
+        return dt
+
+    def _labelled_tock(
+        self,
+        tock_id: str,
+        tick_labels: LabelSet,
+        labels: Optional[Dict[str, Any]],
+    ) -> Tuple[str, LabelSet]:
+        """Return the tock id and label set of the times of a labelled tock."""
+        labelled_tocks = self._labelled_tocks
+        if labelled_tocks is None:
+            labelled_tocks = self._labelled_tocks = {}
+            self._label_sets = set()
+            self._overflow_tocks = {}
+        key = (tock_id, tick_labels, tuple(labels.items()) if labels else ())
+        labelled_tock = labelled_tocks.get(key)
+        if labelled_tock is not None:
+            return labelled_tock
+        full = len(self._label_sets) >= self.collection.max_label_sets
+        if full:
+            # overflowed tocks are memoized by label names, whose number of
+            # combinations is small, so that their values are not hashed
+            overflow_key = (
+                tock_id,
+                tuple(name for name, _ in tick_labels),
+                tuple(labels) if labels else (),
+            )
+            labelled_tock = self._overflow_tocks.get(overflow_key)
+            if labelled_tock is not None:
+                return labelled_tock
+        # labels of the tock override those of the tick
+        label_set = tuple(
+            sorted(
+                (
+                    f"label_{name}" if name in RESERVED_LABELS else str(name),
+                    str(value),
+                )
+                for name, value in {**dict(tick_labels), **(labels or {})}.items()
+            )
+        )
+        if label_set not in self._label_sets:
+            if full:
+                # not memoized by value, so that the memory used stays bounded
+                label_set = tuple((name, OTHER_LABEL) for name, _ in label_set)
+                labelled_tock = self._overflow_tocks[overflow_key] = (
+                    f"{tock_id}{{{format_labels(label_set)}}}",
+                    label_set,
+                )
+                return labelled_tock
+            self._label_sets.add(label_set)
+        labelled_tock = labelled_tocks[key] = (
+            f"{tock_id}{{{format_labels(label_set)}}}",
+            label_set,
+        )
+        return labelled_tock
+
+    def _discard_tick(self) -> None:
+        """Close the innermost nested activation without recording it."""
+        ticks = _TICKS.get()
+        stack = ticks.get(self)
+        if stack is not None and self.is_enabled():
+            _set_tick_stack(ticks, self, stack[1])
+            tree = self.collection.tree
+            if tree is not None:
+                tree.exit(self)
 
     def enable(self):
         self._enabled = True
@@ -88,6 +432,44 @@ class Clock:
         return self._enabled and self.collection._enabled
 
 
+class _NoOpClock(Clock):
+    """A clock that does nothing, returned by `tick` when ticktock is disabled."""
+
+    def __init__(self) -> None:
+        self.tick_name = ""
+        self._enabled = False
+        self._shards = []
+        self._sampler = None
+
+    @property
+    def _tick_time_ns(self) -> Optional[int]:
+        return None
+
+    @property
+    def times(self) -> Dict[str, AggregateTimes]:
+        return {}
+
+    def tick(
+        self, nested: bool = False, labels: Optional[Dict[str, Any]] = None
+    ) -> "Clock":
+        return self
+
+    def tock(self, *args, **kwargs) -> Optional[float]:
+        return None
+
+    def _discard_tick(self) -> None:
+        pass
+
+    def enable(self):
+        pass
+
+    def is_enabled(self):
+        return False
+
+
+_NOOP_CLOCK = _NoOpClock()
+
+
 def tick(
     name: str = "",
     format: Optional[str] = None,
@@ -95,16 +477,27 @@ def tick(
     enabled: Optional[bool] = None,
     collection: Optional["ClockCollection"] = None,
     frame_info: Optional[Tuple[str, int]] = None,
+    stacklevel: int = 1,
+    nested: bool = False,
+    record_nested: bool = True,
+    sampler: Optional[Sampler] = None,
+    labels: Optional[Dict[str, Any]] = None,
 ) -> Clock:
+    if _DISABLED:
+        return _NOOP_CLOCK
     collection = collection or collection_module._DEFAULT_COLLECTION
-    tick_id = "{}:{}".format(*(frame_info or get_frame_info(1)))
+    tick_id, tick_filename, tick_line = get_call_site(
+        collection._call_sites, frame_info, stacklevel
+    )
     if tick_id in collection.clocks:
-        return collection.clocks[tick_id].tick()
+        return collection.clocks[tick_id].tick(nested, labels)
     return Clock(
         name=name,
         format=format,
         collection=collection,
-        frame_info=frame_info or get_frame_info(1),
+        frame_info=(tick_filename, tick_line),
         timer=timer,
         enabled=enabled,
-    ).tick()
+        record_nested=record_nested,
+        sampler=sampler,
+    ).tick(nested, labels)
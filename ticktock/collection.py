@@ -1,17 +1,21 @@
 import atexit
 import logging
+import os
+import sys
+import threading
 import time
 import weakref
-from typing import TYPE_CHECKING, Dict, Optional
-
-import psutil
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Union
 
 if TYPE_CHECKING:
     from ticktock.renderers import AbstractRenderer
     from ticktock.clocks import Clock
+    from ticktock.sampling import Sampler
 
+from ticktock.raw import RawSamples
 from ticktock.std import StandardRenderer
-from ticktock.utils import value_from_env
+from ticktock.tree import CallTree
+from ticktock.utils import CallSite, value_from_env
 
 logger = logging.getLogger("ticktock.timer")
 
@@ -24,15 +28,87 @@ class ClockCollection:
         period: Optional[float] = None,
         renderer: Optional["AbstractRenderer"] = None,
         enabled: Optional[bool] = None,
+        background: bool = False,
+        sampler: Optional["Sampler"] = None,
+        raw_capacity: Optional[int] = None,
+        window: Optional[float] = None,
+        ewma: Optional[float] = None,
+        subtract_overhead: bool = False,
+        tree: bool = False,
+        max_label_sets: Optional[int] = None,
     ) -> None:
         self._enabled = enabled
         if self._enabled is None:
             self._enabled = not value_from_env("TICKTOCK_DISABLE", False)
         self.clocks: Dict[str, "Clock"] = {}
+        self._call_sites: Dict[Hashable, CallSite] = {}
+        # the `shards` of the clocks in each thread, a dict keyed by clock
+        self._local = threading.local()
         self._last_refresh_time_s: Optional[float] = None
         self._period: float = period or value_from_env("TICKTOCK_DEFAULT_PERIOD", 2.0)
+        # the duration of the sliding window of the times, in seconds, and
+        # the weight of new times in their moving average, if tracked
+        window = window or value_from_env("TICKTOCK_WINDOW", 0.0)
+        self._window_ns: Optional[int] = int(window * 1e9) if window else None
+        self._ewma_alpha: float = ewma or value_from_env("TICKTOCK_EWMA", 0.0)
         self.renderer = renderer or StandardRenderer()
+        # the number of distinct label sets of each clock, beyond which
+        # times are recorded with the labels set to "other"
+        self.max_label_sets: int = max_label_sets or value_from_env(
+            "TICKTOCK_MAX_LABEL_SETS", 100
+        )
+        # the default sampler of the clocks of this collection
+        self.sampler = sampler
+        # the last raw samples of all clocks, if enabled
+        self.raw: Optional[RawSamples] = (
+            RawSamples(raw_capacity) if raw_capacity else None
+        )
+        # the clocks arranged by the clocks they are ticked in, if enabled
+        self.tree: Optional[CallTree] = CallTree() if tree else None
+        # the cost of an empty tick and tock, see `calibrate`, and the part
+        # of it that is subtracted from the measured times
+        self.overhead_ns: float = 0
+        self._subtracted_overhead_ns: int = 0
+        self._reporter: Optional[threading.Thread] = None
+        self._stop_reporter = threading.Event()
         _ALL_COLLECTIONS.append(weakref.ref(self))
+        if subtract_overhead:
+            self.calibrate(subtract=True)
+        if background:
+            self.start()
+
+    def calibrate(
+        self,
+        n: int = 10_000,
+        timer: Optional[Callable[[], int]] = None,
+        subtract: Optional[bool] = None,
+    ) -> float:
+        """Measure the time that ticktock adds to the measured times.
+
+        The overhead is the median time measured between a tick and a tock
+        with nothing in between, over `n` measurements with `timer`. It is
+        stored in `overhead_ns`, and subtracted from the times measured by
+        the clocks of this collection if `subtract` (by default, if it was
+        subtracted already).
+        """
+        from ticktock.clocks import tick
+        from ticktock.renderers import AbstractRenderer
+
+        # a separate collection that renders nothing
+        collection = ClockCollection(renderer=AbstractRenderer(), enabled=True)
+        times = []
+        for _ in range(n):
+            t = tick(collection=collection, timer=timer)
+            time_ns = t.tock()
+            if time_ns is None:
+                # ticktock is disabled
+                return 0
+            times.append(time_ns)
+        self.overhead_ns = sorted(times)[n // 2]
+        if subtract is None:
+            subtract = bool(self._subtracted_overhead_ns)
+        self._subtracted_overhead_ns = int(self.overhead_ns) if subtract else 0
+        return self.overhead_ns
 
     def update(self, force: bool = False):
         if self._enabled and (
@@ -42,11 +118,140 @@ class ClockCollection:
                 or time.perf_counter() - self._last_refresh_time_s > self._period
             )
         ):
-            self.renderer.render([clock for clock in self.clocks.values()])
+            clocks = list(self.clocks.values())
+            self.renderer.render(clocks)
+            # the times of the next period are counted from this render
+            for clock in clocks:
+                for _, _, times in clock.thread_times():
+                    times.start_period()
             self._last_refresh_time_s = time.perf_counter()
 
+    def start(self):
+        """Render from a background thread every period instead of on tocks.
+
+        While the reporter thread runs, tocks only record their times.
+        """
+        if self._reporter is not None:
+            return
+        self._stop_reporter.clear()
+        self._reporter = threading.Thread(
+            target=self._report, name="ticktock-reporter", daemon=True
+        )
+        self._reporter.start()
+
+    def stop(self, flush: bool = True, timeout: Optional[float] = None):
+        """Stop the background reporter thread, rendering a last time if `flush`.
+
+        `timeout` bounds the time waited for a render in progress to finish.
+        """
+        if self._reporter is None:
+            return
+        self._stop_reporter.set()
+        if self._reporter is not threading.current_thread():
+            self._reporter.join(timeout)
+        self._reporter = None
+        if flush:
+            self.update(force=True)
+
+    def _report(self):
+        while not self._stop_reporter.wait(self._period):
+            try:
+                self.update(force=True)
+            except Exception:
+                logger.exception("Error while rendering clocks")
+
+    def to_numpy(self) -> Any:
+        """Return the times of all clocks and tocks as a NumPy structured array.
+
+        Each row holds the `name`, `tick_filename`, `tick_line`,
+        `tock_filename` and `tock_line` of a tock, its `count` (estimated
+        with sampling) and `samples`, and its `mean`, `std`, `min`, `max`
+        and `last` times.
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError("ClockCollection.to_numpy requires numpy") from e
+        from ticktock.renderers import _tick_name, name_field_fn
+
+        rows = []
+        for clock in list(self.clocks.values()):
+            sampling_factor = clock.sampling_factor
+            tick_name = _tick_name(clock)
+            for times in list(clock.times.values()):
+                rows.append(
+                    (
+                        str(name_field_fn(clock, times, tick_name)),
+                        clock.tick_filename,
+                        clock.tick_line,
+                        times.tock_filename,
+                        times.tock_line,
+                        round(times.count * sampling_factor),
+                        times.count,
+                        times.avg_time_ns,
+                        times.std_time_ns,
+                        times.min_time_ns,
+                        times.max_time_ns,
+                        times.last_time_ns,
+                    )
+                )
+        # string columns are as wide as their longest value
+        name_width = max((len(row[0]) for row in rows), default=1)
+        filename_width = max((max(len(row[1]), len(row[3])) for row in rows), default=1)
+        dtype = [
+            ("name", f"U{name_width}"),
+            ("tick_filename", f"U{filename_width}"),
+            ("tick_line", np.int64),
+            ("tock_filename", f"U{filename_width}"),
+            ("tock_line", np.int64),
+            ("count", np.int64),
+            ("samples", np.int64),
+            ("mean", np.float64),
+            ("std", np.float64),
+            ("min", np.float64),
+            ("max", np.float64),
+            ("last", np.float64),
+        ]
+        return np.array(rows, dtype=dtype)
+
+    def to_pandas(self) -> Any:
+        """Return the times of all clocks and tocks as a pandas DataFrame.
+
+        The columns are those of `to_numpy`.
+        """
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ImportError("ClockCollection.to_pandas requires pandas") from e
+        return pd.DataFrame(self.to_numpy())
+
+    def merge(self, other: "ClockCollection") -> None:
+        """Add the clocks of `other` to this collection.
+
+        Clocks with the same tick id are combined, as well as their times
+        with the same tock id.
+        """
+        from ticktock.clocks import Clock
+
+        for tick_id, other_clock in list(other.clocks.items()):
+            clock = self.clocks.get(tick_id)
+            if clock is None:
+                clock = Clock(
+                    name=other_clock.tick_name,
+                    timer=other_clock._timer,
+                    collection=self,
+                    frame_info=(other_clock.tick_filename, other_clock.tick_line),
+                )
+            clock.merge(other_clock)
+
     def clear(self):
         self.clocks = {}
+        self._call_sites = {}
+        self._local = threading.local()
+        if self.raw is not None:
+            self.raw.clear()
+        if self.tree is not None:
+            self.tree.clear()
 
     def enable(self):
         for clock in self.clocks.values():
@@ -76,7 +281,24 @@ class ClockCollection:
             self.renderer._no_update = no_update
 
 
-_DEFAULT_COLLECTION = ClockCollection()
+# The default collection is created on first use, see `get_collection`
+_DEFAULT_COLLECTION: ClockCollection
+_DEFAULT_COLLECTION_LOCK = threading.Lock()
+
+
+def __getattr__(name: str):
+    if name == "_DEFAULT_COLLECTION":
+        return get_collection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_collection() -> ClockCollection:
+    """Return the default collection, creating it on first use."""
+    global _DEFAULT_COLLECTION
+    with _DEFAULT_COLLECTION_LOCK:
+        if "_DEFAULT_COLLECTION" not in globals():
+            _DEFAULT_COLLECTION = ClockCollection()
+        return _DEFAULT_COLLECTION
 
 
 def set_collection(collection: ClockCollection):
@@ -85,54 +307,101 @@ def set_collection(collection: ClockCollection):
 
 
 def set_period(period: float):
-    global _DEFAULT_COLLECTION
-    _DEFAULT_COLLECTION._period = period
+    get_collection()._period = period
 
 
 def clear_collection():
-    global _DEFAULT_COLLECTION
-    _DEFAULT_COLLECTION.clear()
+    get_collection().clear()
 
 
 def enable():
-    global _DEFAULT_COLLECTION
-    _DEFAULT_COLLECTION.enable()
+    get_collection().enable()
 
 
 def disable():
-    global _DEFAULT_COLLECTION
-    _DEFAULT_COLLECTION.disable()
+    get_collection().disable()
 
 
 def set_format(format: str = None, max_terms: int = None, no_update: bool = None):
-    global _DEFAULT_COLLECTION
-    _DEFAULT_COLLECTION.set_format(
-        format=format, max_terms=max_terms, no_update=no_update
-    )
+    get_collection().set_format(format=format, max_terms=max_terms, no_update=no_update)
 
 
-@atexit.register
-def final_update():
-    for pid in psutil.pids():
-        # When testing code using ticktock and LoggingRenderer
-        # logging here would cause pytest to flood the output
-        # with logging errors.
-        # https://github.com/pytest-dev/pytest/issues/5502
-        # We chose to avoid logging the final messages in this
-        # context
-
-        # testing whether we are running in pytest is a pain
-        # https://docs.pytest.org/en/latest/example/simple.html#pytest-current-test-environment-variable
-        try:
-            environ = psutil.Process(pid).environ()
-            if "PYTEST_CURRENT_TEST" in environ:
-                return
-        except Exception:
-            pass
-    for collection_ref in _ALL_COLLECTIONS:
-        collection = collection_ref()
-        if collection is not None:
+# Where and how long to render the clocks when the interpreter exits
+_SHUTDOWN_SINK: Optional[Union["AbstractRenderer", str]] = None
+_SHUTDOWN_TIMEOUT_S: float = value_from_env("TICKTOCK_SHUTDOWN_TIMEOUT", 1.0)
+
+
+def set_shutdown(
+    sink: Optional[Union["AbstractRenderer", str]] = None,
+    timeout: Optional[float] = None,
+):
+    """Configure the final rendering of the clocks at interpreter exit.
+
+    `sink` is a renderer, or the path of a file to which the clocks are
+    appended, and defaults to the renderer of each collection. Collections
+    are no longer rendered once `timeout` seconds have elapsed.
+    """
+    global _SHUTDOWN_SINK, _SHUTDOWN_TIMEOUT_S
+    _SHUTDOWN_SINK = sink
+    if timeout is not None:
+        _SHUTDOWN_TIMEOUT_S = timeout
+
+
+def _running_in_pytest() -> bool:
+    # When testing code using ticktock and LoggingRenderer
+    # logging here would cause pytest to flood the output
+    # with logging errors.
+    # https://github.com/pytest-dev/pytest/issues/5502
+    # We chose to avoid logging the final messages in this
+    # context
+    return "PYTEST_CURRENT_TEST" in os.environ or "_pytest" in sys.modules
+
+
+def _final_render(deadline: float) -> None:
+    sink = _SHUTDOWN_SINK
+    out = None
+    try:
+        if isinstance(sink, str):
+            out = open(sink, "a")
+            sink = StandardRenderer(out=out, no_update=True)
+        for collection_ref in _ALL_COLLECTIONS:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            collection = collection_ref()
+            if collection is None:
+                continue
             try:
-                collection.update(force=True)
+                collection.stop(flush=False, timeout=remaining)
+                if sink is None:
+                    collection.update(force=True)
+                elif collection._enabled:
+                    sink.render(list(collection.clocks.values()))
             except:  # noqa: E722
                 pass
+    except OSError:
+        # the file of the sink cannot be written
+        pass
+    finally:
+        if out is not None:
+            out.close()
+
+
+@atexit.register
+def final_update():
+    if _running_in_pytest():
+        return
+    deadline = time.perf_counter() + _SHUTDOWN_TIMEOUT_S
+    # rendering in a daemon thread bounds the time spent in a renderer that
+    # blocks, which is abandoned at the deadline
+    thread = threading.Thread(
+        target=_final_render, args=(deadline,), name="ticktock-shutdown", daemon=True
+    )
+    try:
+        thread.start()
+    except RuntimeError:
+        # threads cannot be started at interpreter shutdown on some versions
+        # of Python, the rendering is then done inline, without a bound
+        _final_render(deadline)
+        return
+    thread.join(max(deadline - time.perf_counter(), 0))
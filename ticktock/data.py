@@ -1,38 +1,394 @@
 import math
-from dataclasses import dataclass
-from typing import Union
+from array import array
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from ticktock.utils import _TockName
+from ticktock.utils import LabelSet, _TockName
+
+# LogHistogram buckets have 2**_SUB_BITS linear sub-buckets per power of two,
+# and hold values up to 2**_MAX_BITS ns (about 3 days)
+_SUB_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BITS
+_MAX_BITS = 48
+_MAX_VALUE = (1 << _MAX_BITS) - 1
+
+# sliding windows are split in this many buckets, the oldest bucket being
+# dropped as the window slides
+_WINDOW_BUCKETS = 6
+
+
+class LogHistogram:
+    """A histogram of durations with log-spaced buckets.
+
+    Values below 16 are counted exactly, larger values fall in buckets
+    whose width is 1/8 of their magnitude, so that quantiles are estimated
+    within about 6%. Recording a value is O(1), and the histogram uses at
+    most 368 counters (under 3KB): counters are only allocated between the
+    smallest and the largest buckets recorded, from `offset`.
+    """
+
+    __slots__ = ("counts", "offset", "total")
+
+    def __init__(self) -> None:
+        self.counts = array("Q")
+        self.offset = 0
+        self.total = 0
+
+    def record(self, value_ns: int) -> None:
+        if value_ns < 2 * _SUB_BUCKETS:
+            index = value_ns if value_ns > 0 else 0
+        else:
+            if value_ns > _MAX_VALUE:
+                value_ns = _MAX_VALUE
+            shift = value_ns.bit_length() - _SUB_BITS - 1
+            index = (shift << _SUB_BITS) + (value_ns >> shift)
+        counts = self.counts
+        offset = self.offset
+        if offset <= index < offset + len(counts):
+            counts[index - offset] += 1
+        else:
+            self._extend(index)
+            self.counts[index - self.offset] += 1
+        self.total += 1
+
+    def _extend(self, index: int) -> None:
+        """Allocate the counters up to bucket `index`."""
+        counts = self.counts
+        if not counts:
+            self.offset = index
+            counts.append(0)
+        elif index < self.offset:
+            self.counts = array("Q", [0]) * (self.offset - index) + counts
+            self.offset = index
+        elif index >= self.offset + len(counts):
+            counts.extend(array("Q", [0]) * (index + 1 - self.offset - len(counts)))
+
+    def _buckets(self) -> List[Tuple[int, int]]:
+        """The index and count of the non-empty buckets."""
+        offset = self.offset
+        return [(offset + i, count) for i, count in enumerate(self.counts) if count]
+
+    def quantile(self, q: float) -> float:
+        """Estimate the `q`-quantile (0 <= q <= 1) of the recorded values."""
+        if not self.total:
+            return 0
+        rank = max(1, math.ceil(q * self.total))
+        cumulative = 0
+        for index, count in enumerate(self.counts, self.offset):
+            cumulative += count
+            if cumulative >= rank:
+                break
+        if index < 2 * _SUB_BUCKETS:
+            return index
+        shift = index // _SUB_BUCKETS - 1
+        low = (index % _SUB_BUCKETS + _SUB_BUCKETS) << shift
+        return low + (1 << shift) / 2
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LogHistogram):
+            return NotImplemented
+        return self._buckets() == other._buckets()
+
+    def __getstate__(self):
+        # only pickle the non-empty buckets
+        return self.total, self._buckets()
+
+    def __setstate__(self, state) -> None:
+        self.total, buckets = state
+        self.counts = array("Q")
+        self.offset = 0
+        if buckets:
+            self._extend(buckets[0][0])
+            self._extend(buckets[-1][0])
+        for index, count in buckets:
+            self.counts[index - self.offset] = count
+
+    def merge(self, other: "LogHistogram") -> None:
+        """Add the values recorded in `other` to this histogram."""
+        buckets = other._buckets()
+        if buckets:
+            self._extend(buckets[0][0])
+            self._extend(buckets[-1][0])
+        counts, offset = self.counts, self.offset
+        for index, count in buckets:
+            counts[index - offset] += count
+        self.total += other.total
+
+    def copy(self) -> "LogHistogram":
+        histogram = LogHistogram()
+        histogram.counts = array("Q", self.counts)
+        histogram.offset = self.offset
+        histogram.total = self.total
+        return histogram
 
 
-@dataclass
 class AggregateTimes:
-    tock_name: Union[str, _TockName]
-    tock_filename: str
-    tock_line: int
+    # the fields compared by __eq__, in the order of __init__
+    _FIELDS = (
+        "tock_name",
+        "tock_filename",
+        "tock_line",
+        "avg_time_ns",
+        "min_time_ns",
+        "max_time_ns",
+        "last_time_ns",
+        "std_time_ns",
+        "_m2_time_ns",
+        "count",
+        "histogram",
+        "labels",
+        "ewma_time_ns",
+        "ewma_alpha",
+        "window_ns",
+    )
+
+    __slots__ = _FIELDS + (
+        "last_tock_time_ns",
+        "_window",
+        "_period_count",
+        "_period_sum",
+    )
+
+    def __init__(
+        self,
+        tock_name: Union[str, _TockName],
+        tock_filename: str,
+        tock_line: int,
+        avg_time_ns: float,
+        min_time_ns: float,
+        max_time_ns: float,
+        last_time_ns: float,
+        std_time_ns: float = 0,
+        _m2_time_ns: float = 0,
+        count: int = 1,
+        histogram: Optional[LogHistogram] = None,
+        # the labels of the times, see `Clock.tock`
+        labels: LabelSet = (),
+        # exponentially weighted moving average of the times, in which each
+        # new time has a weight of `ewma_alpha`, not tracked if it is 0
+        ewma_time_ns: float = math.nan,
+        ewma_alpha: float = 0,
+        # times of the last `window_ns`, in buckets of the tock time, not
+        # tracked if it is None
+        window_ns: Optional[int] = None,
+        last_tock_time_ns: Optional[int] = None,
+    ) -> None:
+        self.tock_name = tock_name
+        self.tock_filename = tock_filename
+        self.tock_line = tock_line
+        self.avg_time_ns = avg_time_ns
+        self.min_time_ns = min_time_ns
+        self.max_time_ns = max_time_ns
+        self.last_time_ns = last_time_ns
+        self.std_time_ns = std_time_ns
+        self._m2_time_ns = _m2_time_ns
+        self.count = count
+        self.labels = labels
+        self.ewma_time_ns = ewma_time_ns
+        self.ewma_alpha = ewma_alpha
+        self.window_ns = window_ns
+        self.last_tock_time_ns = last_tock_time_ns
+        # the epochs, counts and sums of the window buckets, in a single array
+        self._window: Optional[array] = None
+        if window_ns is not None:
+            self._window = array(
+                "d", [-1] * _WINDOW_BUCKETS + [0] * 2 * _WINDOW_BUCKETS
+            )
+        # count and sum of the times at the start of the current period
+        self._period_count = 0
+        self._period_sum: float = 0
+        if histogram is None:
+            histogram = LogHistogram()
+        # an aggregate created without a histogram starts from its first time
+        if not histogram.total:
+            histogram.record(int(last_time_ns))
+            if last_tock_time_ns is not None and window_ns is not None:
+                self._record_window(last_tock_time_ns, last_time_ns)
+        self.histogram = histogram
+        if math.isnan(self.ewma_time_ns):
+            self.ewma_time_ns = last_time_ns if ewma_alpha else 0
 
-    avg_time_ns: float
-    min_time_ns: float
-    max_time_ns: float
-    last_time_ns: float
-    std_time_ns: float = 0
-    _m2_time_ns: float = 0
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for name in self._FIELDS
+            if name != "histogram"
+        )
+        return f"AggregateTimes({fields})"
 
-    count: int = 1
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AggregateTimes):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._FIELDS)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def _record_window(self, tock_time_ns: int, time_ns: float) -> None:
+        window, window_ns = self._window, self.window_ns
+        if window is None or window_ns is None:
+            return
+        epoch = tock_time_ns * _WINDOW_BUCKETS // window_ns
+        index = epoch % _WINDOW_BUCKETS
+        if window[index] != epoch:
+            window[index] = epoch
+            window[index + _WINDOW_BUCKETS] = 0
+            window[index + 2 * _WINDOW_BUCKETS] = 0
+        window[index + _WINDOW_BUCKETS] += 1
+        window[index + 2 * _WINDOW_BUCKETS] += time_ns
 
     def update(self, tock_time_ns: int, tick_time_ns: int) -> None:
 
-        self.last_time_ns = tock_time_ns - tick_time_ns
+        self.last_time_ns = last_time_ns = tock_time_ns - tick_time_ns
+        self.last_tock_time_ns = tock_time_ns
+        self.histogram.record(last_time_ns)
+        if self.ewma_alpha:
+            self.ewma_time_ns += self.ewma_alpha * (last_time_ns - self.ewma_time_ns)
+        if self._window is not None:
+            self._record_window(tock_time_ns, last_time_ns)
+
+        self.count = count = self.count + 1
+        if last_time_ns > self.max_time_ns:
+            self.max_time_ns = last_time_ns
+        if last_time_ns < self.min_time_ns:
+            self.min_time_ns = last_time_ns
+
+        avg_time_ns = self.avg_time_ns
+        delta = last_time_ns - avg_time_ns
+        self.avg_time_ns = avg_time_ns = avg_time_ns + delta / count
+
+        delta2 = last_time_ns - avg_time_ns
+        self._m2_time_ns = m2_time_ns = self._m2_time_ns + delta * delta2
+
+        self.std_time_ns = math.sqrt(m2_time_ns / (count - 1))
+
+    def quantile(self, q: float) -> float:
+        """Estimate the `q`-quantile (0 <= q <= 1) of the times."""
+        if q >= 1:
+            return self.max_time_ns
+        return min(
+            max(self.histogram.quantile(q), self.min_time_ns),
+            self.max_time_ns,
+        )
+
+    def _window_buckets(self, now_ns: int) -> Tuple[float, float]:
+        """The count and sum of the window buckets not older than `now_ns`."""
+        window, window_ns = self._window, self.window_ns
+        if window is None or window_ns is None:
+            return 0, 0
+        oldest = now_ns * _WINDOW_BUCKETS // window_ns - _WINDOW_BUCKETS
+        buckets = [index for index in range(_WINDOW_BUCKETS) if window[index] > oldest]
+        return (
+            sum(window[i + _WINDOW_BUCKETS] for i in buckets),
+            sum(window[i + 2 * _WINDOW_BUCKETS] for i in buckets),
+        )
+
+    def window_count(self, now_ns: int) -> int:
+        """The number of times recorded in the window ending at `now_ns`."""
+        count, _ = self._window_buckets(now_ns)
+        return int(count)
+
+    def window_mean(self, now_ns: int) -> float:
+        """The average of the times recorded in the window ending at `now_ns`."""
+        count, total = self._window_buckets(now_ns)
+        if not count:
+            return 0
+        return total / count
+
+    @property
+    def period_count(self) -> int:
+        """The number of times recorded since the last `start_period`."""
+        return self.count - self._period_count
+
+    @property
+    def period_mean(self) -> float:
+        """The average of the times recorded since the last `start_period`."""
+        count = self.count - self._period_count
+        if not count:
+            return 0
+        return (self.avg_time_ns * self.count - self._period_sum) / count
+
+    def start_period(self) -> None:
+        """Start a new reporting period, see `period_count` and `period_mean`."""
+        self._period_count = self.count
+        self._period_sum = self.avg_time_ns * self.count
+
+    def merge(self, other: "AggregateTimes") -> None:
+        """Add the times aggregated in `other` to these times.
+
+        The result is the same as if all the times of `other` had been
+        recorded here, using the parallel variant of Welford's algorithm
+        (Chan et al.) for the mean and standard deviation. `other` is
+        considered more recent for the last time.
+        """
+        count = self.count + other.count
+        if self.ewma_alpha:
+            self.ewma_time_ns = (
+                self.ewma_time_ns * self.count + other.ewma_time_ns * other.count
+            ) / count
+        self._period_count += other._period_count
+        self._period_sum += other._period_sum
+        window, other_window = self._window, other._window
+        if window is not None and other_window is not None:
+            for index in range(_WINDOW_BUCKETS):
+                epoch = other_window[index]
+                if epoch > window[index]:
+                    window[index::_WINDOW_BUCKETS] = other_window[
+                        index::_WINDOW_BUCKETS
+                    ]
+                elif epoch == window[index]:
+                    window[index + _WINDOW_BUCKETS] += other_window[
+                        index + _WINDOW_BUCKETS
+                    ]
+                    window[index + 2 * _WINDOW_BUCKETS] += other_window[
+                        index + 2 * _WINDOW_BUCKETS
+                    ]
+        if other.last_tock_time_ns is not None:
+            self.last_tock_time_ns = other.last_tock_time_ns
+        delta = other.avg_time_ns - self.avg_time_ns
+        self._m2_time_ns += (
+            other._m2_time_ns + delta * delta * self.count * other.count / count
+        )
+        self.avg_time_ns += delta * other.count / count
+        self.min_time_ns = min(self.min_time_ns, other.min_time_ns)
+        self.max_time_ns = max(self.max_time_ns, other.max_time_ns)
+        self.last_time_ns = other.last_time_ns
+        self.count = count
+        if count >= 2:
+            self.std_time_ns = math.sqrt(self._m2_time_ns / (count - 1))
+        self.histogram.merge(other.histogram)
+
+    def copy(self) -> "AggregateTimes":
+        times = AggregateTimes.__new__(AggregateTimes)
+        times.__setstate__(self.__getstate__())
+        times.histogram = self.histogram.copy()
+        if self._window is not None:
+            times._window = array("d", self._window)
+        return times
+
 
-        self.count += 1
-        self.max_time_ns = max(self.last_time_ns, self.max_time_ns or -math.inf)
-        self.min_time_ns = min(self.last_time_ns, self.min_time_ns or math.inf)
+class TimesShard:
+    """The aggregated times of a clock recorded by a single thread.
 
-        delta = self.last_time_ns - self.avg_time_ns
-        self.avg_time_ns += delta / self.count
+    With sampling, `calls` counts all ticks and `sampled` the measured ones.
+    `last_tick` is the tick stack of the last activation of the clock closed
+    by a tock in the thread, from which tocks without a new tick measure.
+    """
 
-        delta2 = self.last_time_ns - self.avg_time_ns
-        self._m2_time_ns += delta * delta2
+    __slots__ = ("thread_name", "times", "calls", "sampled", "last_tick")
 
-        if self.count >= 2:
-            self.std_time_ns = math.sqrt(self._m2_time_ns / (self.count - 1))
+    def __init__(
+        self,
+        thread_name: str,
+        times: Optional[Dict[str, AggregateTimes]] = None,
+        calls: int = 0,
+        sampled: int = 0,
+    ) -> None:
+        self.thread_name = thread_name
+        self.times: Dict[str, AggregateTimes] = {} if times is None else times
+        self.calls = calls
+        self.sampled = sampled
+        self.last_tick: Optional[Tuple[Optional[int], Any, LabelSet]] = None
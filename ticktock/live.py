@@ -0,0 +1,154 @@
+import logging
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from ticktock.renderers import AbstractRenderer, name_field_fn
+
+if TYPE_CHECKING:
+    from ticktock.clocks import Clock
+
+logger = logging.getLogger("ticktock.live")
+
+MAGIC = b"TICKTOCK"
+VERSION = 1
+
+# magic, version, capacity, sequence number, number of entries, update time
+HEADER = struct.Struct("<8sIIQQd")
+_SEQ_OFFSET = 16
+# an entry is a name, written once, followed by its values: count, samples,
+# then mean, std, min, max, last, p50, p90, p99 and p999 in ns
+NAME_SIZE = 120
+VALUES = struct.Struct("<qq9d")
+ENTRY = struct.Struct(f"<{NAME_SIZE}s{VALUES.format[1:]}")
+
+
+@dataclass
+class LiveEntry:
+    name: str
+    count: int
+    samples: int
+    mean: float
+    std: float
+    min: float
+    max: float
+    last: float
+    p50: float
+    p90: float
+    p99: float
+    p999: float
+
+
+class LiveFileRenderer(AbstractRenderer):
+    """Keep the times of all clocks in a memory-mapped file.
+
+    The file has a fixed layout: a header followed by `capacity` entries,
+    each clock and tock being assigned an entry the first time it is
+    rendered. Entries are updated in place, and other processes can read
+    them at any time with `read_live_file`, or `python -m ticktock top`.
+
+    Writes are guarded by a sequence number in the header, which is odd
+    while the entries are being written, so that readers can detect and
+    retry torn reads without any locking.
+    """
+
+    def __init__(self, path: str, capacity: int = 1024) -> None:
+        self.path = path
+        self.capacity = capacity
+        size = HEADER.size + capacity * ENTRY.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._seq = 0
+        self._entries: Dict[Tuple[str, str], int] = {}
+        self._overflow = False
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, capacity, 0, 0, time.time())
+
+    def render(self, render_data: List["Clock"]) -> None:
+        buffer = self._mmap
+        self._seq += 1
+        struct.pack_into("<Q", buffer, _SEQ_OFFSET, self._seq)
+        for clock in render_data:
+            for tock_id, times in list(clock.times.items()):
+                index = self._entries.get((clock._tick_id, tock_id))
+                if index is None:
+                    if len(self._entries) >= self.capacity:
+                        if not self._overflow:
+                            logger.warning(
+                                f"Live file {self.path} is full, "
+                                "new clocks are not recorded"
+                            )
+                            self._overflow = True
+                        continue
+                    index = len(self._entries)
+                    self._entries[(clock._tick_id, tock_id)] = index
+                    struct.pack_into(
+                        f"{NAME_SIZE}s",
+                        buffer,
+                        HEADER.size + index * ENTRY.size,
+                        name_field_fn(clock, times).encode()[:NAME_SIZE],
+                    )
+                VALUES.pack_into(
+                    buffer,
+                    HEADER.size + index * ENTRY.size + NAME_SIZE,
+                    round(times.count * clock.sampling_factor),
+                    times.count,
+                    times.avg_time_ns,
+                    times.std_time_ns,
+                    times.min_time_ns,
+                    times.max_time_ns,
+                    times.last_time_ns,
+                    times.quantile(0.5),
+                    times.quantile(0.9),
+                    times.quantile(0.99),
+                    times.quantile(0.999),
+                )
+        self._seq += 1
+        HEADER.pack_into(
+            buffer,
+            0,
+            MAGIC,
+            VERSION,
+            self.capacity,
+            self._seq,
+            len(self._entries),
+            time.time(),
+        )
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def read_live_file(path: str, retries: int = 100) -> Tuple[float, List[LiveEntry]]:
+    """Read the entries of a file written by a `LiveFileRenderer`.
+
+    Returns the time of the last update, and the entries.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        for _ in range(retries):
+            magic, version, _, seq, count, updated_at = HEADER.unpack_from(buffer, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a ticktock live file")
+            if seq % 2:
+                time.sleep(0.001)
+                continue
+            entries = [
+                ENTRY.unpack_from(buffer, HEADER.size + index * ENTRY.size)
+                for index in range(count)
+            ]
+            if struct.unpack_from("<Q", buffer, _SEQ_OFFSET)[0] == seq:
+                return updated_at, [
+                    LiveEntry(name.rstrip(b"\0").decode(errors="replace"), *values)
+                    for name, *values in entries
+                ]
+        raise RuntimeError(f"Could not read a consistent snapshot of {path}")
+    finally:
+        buffer.close()
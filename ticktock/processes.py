@@ -0,0 +1,161 @@
+import logging
+import multiprocessing
+import multiprocessing.util
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from ticktock import collection as collection_module
+from ticktock.clocks import Clock
+from ticktock.collection import ClockCollection, set_collection
+from ticktock.data import AggregateTimes, TimesShard
+from ticktock.renderers import AbstractRenderer
+
+logger = logging.getLogger("ticktock.processes")
+
+# (tick_id, tick_filename, tick_line, tick_name, tock_id, times, calls, sampled)
+_Update = Tuple[str, str, int, str, str, AggregateTimes, int, int]
+
+
+class QueueRenderer(AbstractRenderer):
+    """Send the times of clocks that changed since the last render to a queue.
+
+    Used in worker processes, see `init_worker`.
+    """
+
+    def __init__(self, queue: Any) -> None:
+        self._queue = queue
+        self._sent_counts: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def render(self, render_data: List["Clock"]) -> None:
+        updates: List[_Update] = []
+        for clock in render_data:
+            # the ticks and measured ticks of the clock, with sampling
+            calls = sampled = 0
+            for shard in list(clock._shards):
+                calls += shard.calls
+                sampled += shard.sampled
+            for tock_id, times in list(clock.times.items()):
+                key = (clock._tick_id, tock_id)
+                if self._sent_counts.get(key) == (times.count, calls):
+                    continue
+                self._sent_counts[key] = (times.count, calls)
+                updates.append(
+                    (
+                        clock._tick_id,
+                        clock.tick_filename,
+                        clock.tick_line,
+                        clock.tick_name,
+                        tock_id,
+                        times,
+                        calls,
+                        sampled,
+                    )
+                )
+        if updates:
+            self._queue.put((os.getpid(), updates))
+
+
+def init_worker(queue: Any, period: Optional[float] = None) -> None:
+    """Send the clocks of this worker process to a `ProcessCollector`.
+
+    Use it as the initializer of a process pool, with the `queue` of the
+    collector:
+
+        ProcessPoolExecutor(initializer=init_worker, initargs=(collector.queue,))
+
+    The worker gets a new default collection, which sends the times of its
+    clocks every `period`, and a last time when the process exits.
+    """
+    collection = ClockCollection(period=period, renderer=QueueRenderer(queue))
+    set_collection(collection)
+    # worker processes exit without running atexit handlers, but run the
+    # multiprocessing finalizers. Queues are closed by a finalizer of
+    # priority 10, so the last times must be sent before
+    multiprocessing.util.Finalize(
+        None, collection.update, kwargs={"force": True}, exitpriority=100
+    )
+
+
+class ProcessCollector:
+    """Merge the clocks of worker processes into a collection of this process.
+
+    Clocks with the same tick id in different processes are combined into a
+    single clock, which keeps the latest times sent by each process.
+    """
+
+    def __init__(
+        self,
+        collection: Optional[ClockCollection] = None,
+        context: Optional[Any] = None,
+    ) -> None:
+        self.collection = collection or collection_module._DEFAULT_COLLECTION
+        self.queue = (context or multiprocessing).Queue()
+        self._shards: Dict[Tuple[int, str], TimesShard] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._collect, name="ticktock-collector", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop collecting, once all times sent so far are received."""
+        if self._thread is None:
+            return
+        self.queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self.collection.update(force=True)
+
+    def __enter__(self) -> "ProcessCollector":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def _collect(self) -> None:
+        while True:
+            message = self.queue.get()
+            if message is None:
+                return
+            try:
+                self.receive(*message)
+            except Exception:
+                logger.exception("Error while collecting clocks")
+
+    def receive(self, pid: int, updates: List[_Update]) -> None:
+        for (
+            tick_id,
+            tick_filename,
+            tick_line,
+            tick_name,
+            tock_id,
+            times,
+            calls,
+            sampled,
+        ) in updates:
+            shard = self._shards.get((pid, tick_id))
+            if shard is None:
+                clock = self.collection.clocks.get(tick_id)
+                if clock is None:
+                    clock = Clock(
+                        name=tick_name,
+                        collection=self.collection,
+                        frame_info=(tick_filename, tick_line),
+                    )
+                shard = self._shards[(pid, tick_id)] = TimesShard(
+                    thread_name=f"pid {pid}"
+                )
+                clock._shards.append(shard)
+            # processes send their cumulated times and counts, so that
+            # receiving them again is harmless
+            shard.times[tock_id] = times
+            shard.calls = calls
+            shard.sampled = sampled
+        if self.collection._reporter is None:
+            self.collection.update(force=False)
@@ -0,0 +1,86 @@
+import itertools
+import threading
+from array import array
+from typing import Any, Dict, List, Tuple
+
+# each sample is stored as three consecutive int64 in the buffer
+_FIELDS = ("tick_ns", "duration_ns", "slot")
+
+
+class RawSamples:
+    """A ring buffer of the last `capacity` measurements of a collection.
+
+    Each sample is a `(tick_ns, duration_ns, slot)` triple written in place
+    in a preallocated buffer, where `slot` identifies the clock and tock of
+    the measurement (see `slots`). Once the buffer is full, the oldest
+    samples are overwritten.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._buffer = array("q", bytes(8 * len(_FIELDS) * capacity))
+        self._index = itertools.count()
+        self._recorded = 0
+        # (tick_id, tock_id) of each slot
+        self.slots: List[Tuple[str, str]] = []
+        self._slot_ids: Dict[Tuple[str, str], int] = {}
+        # serializes the assignment of new slots
+        self._lock = threading.Lock()
+
+    def slot(self, tick_id: str, tock_id: str) -> int:
+        """Return the slot of a clock and tock, assigning a new one if needed."""
+        key = (tick_id, tock_id)
+        slot = self._slot_ids.get(key)
+        if slot is None:
+            with self._lock:
+                slot = self._slot_ids.get(key)
+                if slot is None:
+                    slot = len(self.slots)
+                    self.slots.append(key)
+                    self._slot_ids[key] = slot
+        return slot
+
+    def record(self, tick_ns: int, duration_ns: int, slot: int) -> None:
+        n = next(self._index)
+        i = n % self.capacity * 3
+        buffer = self._buffer
+        buffer[i] = tick_ns
+        buffer[i + 1] = duration_ns
+        buffer[i + 2] = slot
+        self._recorded = n + 1
+
+    def __len__(self) -> int:
+        return min(self._recorded, self.capacity)
+
+    def clear(self) -> None:
+        self._index = itertools.count()
+        self._recorded = 0
+        with self._lock:
+            self.slots = []
+            self._slot_ids = {}
+
+    def to_numpy(self, ordered: bool = False) -> Any:
+        """Return the samples as a NumPy structured array.
+
+        The array is a view on the buffer, without copy, so that it changes
+        as new samples are recorded. Once the buffer has wrapped around,
+        the samples are in the order of the buffer, unless `ordered`, in
+        which case they are copied in the order they were recorded.
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError("RawSamples.to_numpy requires numpy") from e
+
+        samples = np.frombuffer(
+            self._buffer, dtype=[(field, np.int64) for field in _FIELDS]
+        )
+        recorded = self._recorded
+        if recorded < self.capacity:
+            return samples[:recorded]
+        if ordered:
+            start = recorded % self.capacity
+            return np.concatenate((samples[start:], samples[:start]))
+        return samples
@@ -1,9 +1,12 @@
 import abc
 import logging
 import os
-from typing import TYPE_CHECKING, List
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 
-from ticktock.utils import _TockName
+from ticktock.utils import _TockName, format_labels
 
 if TYPE_CHECKING:
     from ticktock.clocks import Clock
@@ -12,6 +15,11 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger("ticktock.renderers")
 
+# characters that cannot appear in StatsD metric names or tags
+_STATSD_INVALID = re.compile(r"[:|@#,\s]")
+# characters that cannot appear in Prometheus label names
+_PROMETHEUS_INVALID = re.compile(r"[^a-zA-Z0-9_]")
+
 
 class AbstractRenderer(abc.ABC):
     def render(self, render_data: List["Clock"]) -> None:
@@ -19,31 +27,54 @@ class AbstractRenderer(abc.ABC):
 
 
 TIME_FIELDS = {
-    "mean": lambda times: times.avg_time_ns,
-    "std": lambda times: times.std_time_ns,
-    "min": lambda times: times.min_time_ns,
-    "max": lambda times: times.max_time_ns,
-    "last": lambda times: times.last_time_ns,
+    "mean": lambda clock, times: times.avg_time_ns,
+    "std": lambda clock, times: times.std_time_ns,
+    "min": lambda clock, times: times.min_time_ns,
+    "max": lambda clock, times: times.max_time_ns,
+    "last": lambda clock, times: times.last_time_ns,
+    "p50": lambda clock, times: times.quantile(0.5),
+    "p90": lambda clock, times: times.quantile(0.9),
+    "p99": lambda clock, times: times.quantile(0.99),
+    "p999": lambda clock, times: times.quantile(0.999),
+    "ewma": lambda clock, times: times.ewma_time_ns,
+    "mean_period": lambda clock, times: times.period_mean,
+    "mean_window": lambda clock, times: times.window_mean(clock._timer()),
+    "overhead": lambda clock, times: clock.collection.overhead_ns,
 }
 
 
-def name_field_fn(clock: "Clock", times: "AggregateTimes"):
+def name_field_fn(
+    clock: "Clock", times: "AggregateTimes", tick_name: Optional[str] = None
+):
+    name = _unlabelled_name(clock, times, tick_name)
+    if times.labels:
+        return f"{name}{{{format_labels(times.labels)}}}"
+    return name
+
+
+def _tick_name(clock: "Clock") -> str:
+    # the file of an unnamed tick is looked up on disk, callers naming many
+    # tocks resolve it once per clock
+    if clock.tick_name:
+        return clock.tick_name
+    if os.path.exists(clock.tick_filename):
+        return os.path.basename(clock.tick_filename)
+    return clock.tick_filename
+
+
+def _unlabelled_name(
+    clock: "Clock", times: "AggregateTimes", tick_name: Optional[str] = None
+):
     if times.tock_name == _TockName.DECORATOR:
         return clock.tick_name
     if times.tock_name == _TockName.CONTEXTMANAGER:
         if clock.tick_name:
             return clock.tick_name
-    if clock.tick_name:
-        if times.tock_name:
-            return f"{clock.tick_name}-{times.tock_name}"
-        else:
-            return f"{clock.tick_name}:{clock.tick_line}-{times.tock_line}"
-    else:
-        if os.path.exists(clock.tick_filename):
-            tick_name = os.path.basename(clock.tick_filename)
-        else:
-            tick_name = clock.tick_filename
-        return f"{tick_name}:{clock.tick_line}-{times.tock_line}"
+    if clock.tick_name and times.tock_name:
+        return f"{clock.tick_name}-{times.tock_name}"
+    if tick_name is None:
+        tick_name = _tick_name(clock)
+    return f"{tick_name}:{clock.tick_line}-{times.tock_line}"
 
 
 CONSTANT_FIELDS = {
@@ -54,10 +85,19 @@ CONSTANT_FIELDS = {
     "tock_line": lambda clock, times: times.tock_line,
     "tick_filename": lambda clock, times: clock.tick_filename,
     "tock_filename": lambda clock, times: times.tock_filename,
+    "labels": lambda clock, times: format_labels(times.labels),
 }
 
 RAW_FIELDS = {
-    "count": lambda clock, times: times.count,
+    "count": lambda clock, times: round(times.count * clock.sampling_factor),
+    "samples": lambda clock, times: times.count,
+    "sample_rate": lambda clock, times: 1 / clock.sampling_factor,
+    "count_period": lambda clock, times: round(
+        times.period_count * clock.sampling_factor
+    ),
+    "count_window": lambda clock, times: round(
+        times.window_count(clock._timer()) * clock.sampling_factor
+    ),
     "avg_time_ns": lambda clock, times: times.avg_time_ns,
     "std_time_ns": lambda clock, times: times.std_time_ns,
     "min_time_ns": lambda clock, times: times.min_time_ns,
@@ -68,8 +108,13 @@ RAW_FIELDS = {
 
 class LoggingRenderer(AbstractRenderer):
     def __init__(
-        self, logger=None, level: str = "INFO", extra_as_kwargs: bool = False
+        self,
+        logger=None,
+        level: str = "INFO",
+        extra_as_kwargs: bool = False,
+        per_thread: bool = False,
     ) -> None:
+        self._per_thread = per_thread
         self.logger = logger or logging.getLogger("ticktock")
         _log_function = {
             "DEBUG": self.logger.debug,
@@ -92,13 +137,345 @@ class LoggingRenderer(AbstractRenderer):
 
     def render(self, render_data: List["Clock"]) -> None:
         for clock in render_data:
-            for times in clock.times.values():
-                self._log(
-                    "clock",
-                    clock_name=name_field_fn(clock, times),
-                    mean=times.avg_time_ns * 1e-9,
-                    std=times.std_time_ns * 1e-9,
-                    min=times.min_time_ns * 1e-9,
-                    max=times.max_time_ns * 1e-9,
-                    count=times.count,
+            if self._per_thread:
+                for thread_name, _, times in clock.thread_times():
+                    self._log_times(clock, times, thread_name=thread_name)
+            else:
+                for times in list(clock.times.values()):
+                    self._log_times(clock, times)
+
+    def _log_times(self, clock: "Clock", times: "AggregateTimes", **kwargs) -> None:
+        self._log(
+            "clock",
+            clock_name=name_field_fn(clock, times),
+            mean=times.avg_time_ns * 1e-9,
+            std=times.std_time_ns * 1e-9,
+            min=times.min_time_ns * 1e-9,
+            max=times.max_time_ns * 1e-9,
+            p50=times.quantile(0.5) * 1e-9,
+            p90=times.quantile(0.9) * 1e-9,
+            p99=times.quantile(0.99) * 1e-9,
+            p999=times.quantile(0.999) * 1e-9,
+            count=round(times.count * clock.sampling_factor),
+            samples=times.count,
+            labels=dict(times.labels),
+            **kwargs,
+        )
+
+
+def _prometheus_label_name(name: str) -> str:
+    name = _PROMETHEUS_INVALID.sub("_", name)
+    # names cannot start with a digit, and those starting with __ are reserved
+    if name[:1].isdigit() or name.startswith("__"):
+        return f"label_{name}"
+    return name
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+class PrometheusRenderer(AbstractRenderer):
+    """Expose the clocks as Prometheus summaries.
+
+    Each clock and tock is a summary of the times in seconds, labeled with
+    its name and the labels of its times, with the p50, p90, p99 and p999
+    quantiles, its sum and count.
+    The metrics are computed from the clocks of the last render whenever
+    they are scraped, from `exposition()` or the HTTP server started with
+    `serve`, without any lock held on the ticking threads.
+    """
+
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    def __init__(
+        self,
+        metric_name: str = "ticktock_seconds",
+        port: Optional[int] = None,
+        addr: str = "127.0.0.1",
+    ) -> None:
+        self.metric_name = metric_name
+        self._clocks: List["Clock"] = []
+        self._server: Optional[Any] = None
+        if port is not None:
+            self.serve(port, addr)
+
+    def render(self, render_data: List["Clock"]) -> None:
+        self._clocks = list(render_data)
+
+    def exposition(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        metric = self.metric_name
+        lines = [
+            f"# HELP {metric} Times measured by ticktock clocks.",
+            f"# TYPE {metric} summary",
+        ]
+        for clock in self._clocks:
+            sampling_factor = clock.sampling_factor
+            tick_name = _tick_name(clock)
+            for times in list(clock.times.values()):
+                label = ",".join(
+                    f'{name}="{_escape_label(str(value))}"'
+                    for name, value in [
+                        ("name", _unlabelled_name(clock, times, tick_name)),
+                        *(
+                            (_prometheus_label_name(name), value)
+                            for name, value in times.labels
+                        ),
+                    ]
+                )
+                for q in self.QUANTILES:
+                    lines.append(
+                        f'{metric}{{{label},quantile="{q}"}} '
+                        f"{times.quantile(q) * 1e-9!r}"
+                    )
+                count = round(times.count * sampling_factor)
+                lines.append(
+                    f"{metric}_sum{{{label}}} {times.avg_time_ns * count * 1e-9!r}"
+                )
+                lines.append(f"{metric}_count{{{label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 0, addr: str = "127.0.0.1") -> int:
+        """Serve the metrics on `/metrics` from a background thread.
+
+        Returns the port of the server, which is chosen by the system if
+        `port` is 0.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        renderer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = renderer.exposition().encode()
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", "text/plain; version=0.0.4; charset=utf-8"
+                )
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.close()
+        self._server = ThreadingHTTPServer((addr, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever,
+            name="ticktock-prometheus",
+            daemon=True,
+        ).start()
+        return self._server.server_address[1]
+
+    def close(self) -> None:
+        """Stop the HTTP server, if any."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class StatsdRenderer(AbstractRenderer):
+    """Send the clocks to a StatsD agent over UDP.
+
+    At each render, each clock and tock sends the number of times measured
+    since the previous render as a counter, and their mean, p50, p90 and
+    p99 as gauges in milliseconds. Metrics are packed in datagrams of at
+    most `max_packet_size` bytes, and sent without waiting: datagrams that
+    cannot be sent are dropped.
+
+    With `dogstatsd`, the name of the clocks is sent as a `name` tag along
+    with `tags` and the labels of the times, instead of being part of the
+    metric name.
+
+    The address of the agent is resolved once, when the renderer is created.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8125,
+        prefix: str = "ticktock",
+        max_packet_size: int = 1432,
+        dogstatsd: bool = False,
+        tags: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.prefix = prefix
+        self.max_packet_size = max_packet_size
+        self.dogstatsd = dogstatsd
+        self.tags = tags or {}
+        import socket
+
+        family, socktype, proto, _, address = socket.getaddrinfo(
+            host, port, type=socket.SOCK_DGRAM
+        )[0]
+        # the resolved (host, port) of the agent, with IPv6 fields if any
+        self.address: Tuple[Any, ...] = address
+        self._socket = socket.socket(family, socktype, proto)
+        self._socket.setblocking(False)
+        # datagrams are sent without resolving the address each time
+        self._socket.connect(self.address)
+
+    def _metrics(self, clock: "Clock", times: "AggregateTimes") -> Iterator[str]:
+        if self.dogstatsd:
+            name = _STATSD_INVALID.sub("_", str(_unlabelled_name(clock, times)))
+            prefix = self.prefix
+            tags = "|#" + ",".join(
+                f"{k}:{v}"
+                for k, v in {
+                    **self.tags,
+                    "name": name,
+                    **{
+                        _STATSD_INVALID.sub("_", k): _STATSD_INVALID.sub("_", v)
+                        for k, v in times.labels
+                    },
+                }.items()
+            )
+        else:
+            name = _STATSD_INVALID.sub("_", str(name_field_fn(clock, times)))
+            prefix = f"{self.prefix}.{name}"
+            tags = ""
+        count = round(times.period_count * clock.sampling_factor)
+        yield f"{prefix}.count:{count}|c{tags}"
+        if count:
+            yield f"{prefix}.mean:{times.period_mean * 1e-6:g}|g{tags}"
+        for q, field_name in [(0.5, "p50"), (0.9, "p90"), (0.99, "p99")]:
+            yield f"{prefix}.{field_name}:{times.quantile(q) * 1e-6:g}|g{tags}"
+
+    def render(self, render_data: List["Clock"]) -> None:
+        packet = b""
+        for clock in render_data:
+            for times in list(clock.times.values()):
+                for metric in self._metrics(clock, times):
+                    line = metric.encode()
+                    if packet and len(packet) + 1 + len(line) > self.max_packet_size:
+                        self._send(packet)
+                        packet = b""
+                    packet = packet + b"\n" + line if packet else line
+        if packet:
+            self._send(packet)
+
+    def _send(self, packet: bytes) -> None:
+        try:
+            self._socket.send(packet)
+        except OSError:
+            # the agent is absent or the socket buffer is full
+            pass
+
+    def close(self) -> None:
+        self._socket.close()
+
+
+class JsonLinesRenderer(AbstractRenderer):
+    """Append the clocks to a file as JSON lines.
+
+    At each render, each clock and tock is serialized as a compact JSON
+    object on its own line, with the render `time`, its `name`, counts and
+    statistics in ns, and the lines of all clocks are appended with a
+    single write.
+
+    The file is rotated when it would exceed `max_bytes`, or every
+    `rotate_every` seconds: it is renamed with a `.1` suffix (and gzipped
+    with `compress`), older files being shifted up to `backup_count`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: Optional[int] = None,
+        rotate_every: Optional[float] = None,
+        backup_count: int = 5,
+        compress: bool = False,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_every = rotate_every
+        self.backup_count = backup_count
+        self.compress = compress
+        # json is imported with the renderer, it is not needed otherwise
+        import json
+
+        self._encode = json.JSONEncoder(separators=(",", ":")).encode
+        self._open()
+
+    def _open(self) -> None:
+        self._file = open(self.path, "ab", buffering=0)
+        self._size = self._file.seek(0, os.SEEK_END)
+        self._opened_at = time.time()
+
+    def render(self, render_data: List["Clock"]) -> None:
+        now = time.time()
+        lines = []
+        for clock in render_data:
+            sampling_factor = clock.sampling_factor
+            for tock_id, times in list(clock.times.items()):
+                lines.append(
+                    self._encode(
+                        {
+                            "time": now,
+                            "name": str(name_field_fn(clock, times)),
+                            "tick_id": clock._tick_id,
+                            "tock_id": tock_id,
+                            "labels": dict(times.labels),
+                            "count": round(times.count * sampling_factor),
+                            "samples": times.count,
+                            "count_period": round(times.period_count * sampling_factor),
+                            "mean": times.avg_time_ns,
+                            "std": times.std_time_ns,
+                            "min": times.min_time_ns,
+                            "max": times.max_time_ns,
+                            "last": times.last_time_ns,
+                            "p50": times.quantile(0.5),
+                            "p90": times.quantile(0.9),
+                            "p99": times.quantile(0.99),
+                            "p999": times.quantile(0.999),
+                            "mean_period": times.period_mean,
+                        }
+                    )
                 )
+        if not lines:
+            return
+        data = ("\n".join(lines) + "\n").encode()
+        if self._size and (
+            (self.max_bytes is not None and self._size + len(data) > self.max_bytes)
+            or (
+                self.rotate_every is not None
+                and now - self._opened_at >= self.rotate_every
+            )
+        ):
+            self.rotate()
+        self._file.write(data)
+        self._size += len(data)
+
+    def _backup_path(self, index: int) -> str:
+        return f"{self.path}.{index}" + (".gz" if self.compress else "")
+
+    def rotate(self) -> None:
+        """Move the current file to its first backup, and start a new one."""
+        self._file.close()
+        if os.path.exists(self._backup_path(self.backup_count)):
+            os.remove(self._backup_path(self.backup_count))
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(self._backup_path(index)):
+                os.replace(self._backup_path(index), self._backup_path(index + 1))
+        if self.backup_count < 1:
+            os.remove(self.path)
+        elif self.compress:
+            import gzip
+            import shutil
+
+            with open(self.path, "rb") as f, gzip.open(self._backup_path(1), "wb") as g:
+                shutil.copyfileobj(f, g)
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self._backup_path(1))
+        self._open()
+
+    def close(self) -> None:
+        self._file.close()
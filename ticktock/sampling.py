@@ -0,0 +1,75 @@
+import abc
+import copy
+import itertools
+import random
+import time
+
+
+class Sampler(abc.ABC):
+    """Decide which ticks of a clock are measured.
+
+    Samplers are called on every tick of a clock, and the tick is only
+    measured if they return True.
+    """
+
+    @abc.abstractmethod
+    def __call__(self) -> bool:
+        ...
+
+    def copy(self) -> "Sampler":
+        """Return a sampler with the same policy, and its own state.
+
+        Each clock of a collection uses a copy of the sampler of the
+        collection, so that clocks are sampled independently.
+        """
+        return copy.copy(self)
+
+
+class EveryN(Sampler):
+    """Measure one tick out of `n`."""
+
+    def __init__(self, n: int) -> None:
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        self.n = n
+        self._counter = itertools.count()
+
+    def __call__(self) -> bool:
+        return not next(self._counter) % self.n
+
+    def copy(self) -> "EveryN":
+        return EveryN(self.n)
+
+
+class Probabilistic(Sampler):
+    """Measure each tick with probability `p`."""
+
+    def __init__(self, p: float) -> None:
+        if not 0 < p <= 1:
+            raise ValueError("p must be in ]0, 1]")
+        self.p = p
+
+    def __call__(self) -> bool:
+        return random.random() < self.p
+
+
+class MaxRate(Sampler):
+    """Measure at most `max_per_s` ticks per second."""
+
+    def __init__(self, max_per_s: float) -> None:
+        self.max_per_s = max_per_s
+        self._second = -1
+        self._count = 0
+
+    def copy(self) -> "MaxRate":
+        return MaxRate(self.max_per_s)
+
+    def __call__(self) -> bool:
+        second = int(time.monotonic())
+        if second != self._second:
+            self._second = second
+            self._count = 0
+        if self._count < self.max_per_s:
+            self._count += 1
+            return True
+        return False
@@ -6,12 +6,14 @@ from functools import partial
 from string import Formatter
 from typing import (
     TYPE_CHECKING,
+    Any,
     Callable,
     Dict,
     Iterable,
     List,
     Optional,
     TextIO,
+    Tuple,
     Union,
 )
 
@@ -26,19 +28,29 @@ from ticktock.utils import format_ns_interval
 if TYPE_CHECKING:
     from ticktock.clocks import Clock
     from ticktock.data import AggregateTimes
+    from ticktock.tree import CallTree
 
-try:
-    import tqdm
-
-    has_tqdm = True
-except ImportError:
-    has_tqdm = False
+# tqdm is imported on the first render, it is slow to import
+_tqdm: Optional[Any] = None
 
 logger = logging.getLogger("ticktock.renderers")
 
 UP: Callable[[int], str] = lambda x: f"\x1B[{x}A" if x else ""
+DOWN: Callable[[int], str] = lambda x: f"\x1B[{x}B" if x else ""
 CLR = "\r\x1B[0K"
 
+# fields whose value can change without new times being recorded
+VOLATILE_FIELDS = {
+    "mean_period",
+    "count_period",
+    "mean_window",
+    "count_window",
+    "overhead",
+}
+
+# the format of the lines of the call tree, see `StandardRenderer(tree=True)`
+TREE_FORMAT = "⏱️ {indent}[{name}] {total} total, {self} self, count={count}"
+
 FORMATS = {
     "short": "⏱️ [{name}] {mean} count={count}",
     "long": "⏱️ [{name}] "
@@ -47,28 +59,50 @@ FORMATS = {
 }
 
 
+def _get_tqdm() -> Any:
+    """Return the tqdm module, or False if it is not installed."""
+    global _tqdm
+    if _tqdm is None:
+        try:
+            import tqdm
+
+            _tqdm = tqdm
+        except ImportError:
+            _tqdm = False
+    return _tqdm
+
+
 @dataclass
 class FormattingData:
     format: str
-    precomputed_format: Dict[str, Callable[..., str]]
+    precomputed_format: Dict[Tuple[str, str, Optional[str]], Callable[..., str]]
     raw_fields: List[str]
     time_fields: List[str]
     constant_fields: List[str]
     max_terms: int
+    volatile: bool = False
 
-    def render(self, clock: "Clock", tock_id: str, times: "AggregateTimes") -> str:
-        if tock_id not in self.precomputed_format:
-            self.precomputed_format[tock_id] = partial(
-                self.format.format,
-                **{
-                    key: CONSTANT_FIELDS[key](clock, times)
-                    for key in self.constant_fields
-                },
+    def render(
+        self,
+        clock: "Clock",
+        tock_id: str,
+        times: "AggregateTimes",
+        thread_name: Optional[str] = None,
+    ) -> str:
+        format_key = (clock._tick_id, tock_id, thread_name)
+        if format_key not in self.precomputed_format:
+            constants = {
+                key: CONSTANT_FIELDS[key](clock, times) for key in self.constant_fields
+            }
+            if thread_name is not None and "name" in constants:
+                constants["name"] = f"{constants['name']} @{thread_name}"
+            self.precomputed_format[format_key] = partial(
+                self.format.format, **constants
             )
-        return self.precomputed_format[tock_id](
+        return self.precomputed_format[format_key](
             **{
                 key: format_ns_interval(
-                    TIME_FIELDS[key](times), max_terms=self.max_terms
+                    TIME_FIELDS[key](clock, times), max_terms=self.max_terms
                 )
                 for key in self.time_fields
             },
@@ -89,11 +123,23 @@ class StandardRenderer(AbstractRenderer):
         out: TextIO = sys.stderr,
         max_terms: int = 2,
         no_update: bool = False,
+        per_thread: bool = False,
+        tree: bool = False,
     ) -> None:
         self._max_terms = max_terms
         self._out = out
         self._no_update = no_update
+        self._per_thread = per_thread
+        self._tree = tree
         self._has_printed = 0
+        # the lines of the last render, to only rewrite those that changed
+        self._printed: List[str] = []
+        # the last line of each tock, with the formatting data, clock, count
+        # and sampling factor it was rendered with
+        self._lines: Dict[
+            Tuple[str, str, Optional[str]],
+            Tuple[FormattingData, "Clock", int, float, str],
+        ] = {}
         self.set_format(format or os.environ.get("TICKTOCK_DEFAULT_FORMAT") or "short")
 
     def set_format(self, format: str, tick_id: Optional[str] = None):
@@ -123,39 +169,117 @@ class StandardRenderer(AbstractRenderer):
             time_fields=time_fields,
             constant_fields=constant_fields,
             max_terms=self._max_terms,
+            volatile=any(
+                field_name in VOLATILE_FIELDS for field_name in raw_fields + time_fields
+            ),
         )
 
     def render(self, clocks: List["Clock"]) -> None:
         logger.debug("Rendering clock format={self._format}")
         ls: List[str] = []
-        for clock in clocks:
-            for line in self.render_times(clock):
-                ls.append(line)
-        if has_tqdm:
+        tree = clocks[0].collection.tree if self._tree and clocks else None
+        if tree is not None:
+            ls = self.render_tree(tree)
+        else:
+            for clock in clocks:
+                for line in self.render_times(clock):
+                    ls.append(line)
+            if len(self._lines) > len(ls):
+                # some clocks or tocks were removed since the last render
+                self._prune(clocks)
+        changed = (
+            [
+                i
+                for i, (line, printed) in enumerate(zip(ls, self._printed))
+                if line != printed
+            ]
+            if len(ls) == len(self._printed) and not self._no_update
+            else None
+        )
+        if self._no_update:
+            text = "\n".join(ls) + "\n"
+        elif changed is None or 2 * len(changed) > len(ls):
+            text = UP(self._has_printed) + CLR + f"\n{CLR}".join(ls) + "\n"
+        elif changed:
+            # move up to each line that changed, and back below the last line
+            n = len(ls)
+            text = "".join(
+                UP(n - i) + CLR + ls[i] + DOWN(n - i) + "\r" for i in changed
+            )
+        else:
+            return
+        tqdm = _get_tqdm()
+        if tqdm:
             with tqdm.tqdm.external_write_mode(sys.stderr, nolock=True):
-                if self._no_update:
-                    self._out.write("\n".join(ls) + "\n")
-                else:
-                    self._out.write(
-                        UP(self._has_printed) + CLR + f"\n{CLR}".join(ls) + "\n"
-                    )
+                self._out.write(text)
                 self._out.flush()
         else:
-            if self._no_update:
-                self._out.write("\n".join(ls) + "\n")
-            else:
-                self._out.write(
-                    UP(self._has_printed) + CLR + f"\n{CLR}".join(ls) + "\n"
-                )
+            self._out.write(text)
             self._out.flush()
+        self._printed = ls
         self._has_printed = len(ls)
 
+    def _items(
+        self, clock: "Clock"
+    ) -> Iterable[Tuple[Optional[str], str, "AggregateTimes"]]:
+        if self._per_thread:
+            return clock.thread_times()
+        return ((None, tock_id, times) for tock_id, times in list(clock.times.items()))
+
+    def _prune(self, clocks: List["Clock"]) -> None:
+        """Forget the lines and formats of the tocks that are not in `clocks`."""
+        keys = {
+            (clock._tick_id, tock_id, thread_name)
+            for clock in clocks
+            for thread_name, tock_id, _ in self._items(clock)
+        }
+        self._lines = {key: self._lines[key] for key in keys if key in self._lines}
+        for formatting_data in list(self._formatting_data.values()):
+            precomputed_format = formatting_data.precomputed_format
+            for key in list(precomputed_format):
+                if key not in keys:
+                    precomputed_format.pop(key, None)
+
     def render_times(self, clock: "Clock") -> Iterable[str]:
-        if clock._tick_id in self._formatting_data:
-            for tock_id, times in clock.times.items():
-                yield self._formatting_data[clock._tick_id].render(
-                    clock, tock_id, times
-                )
-            return
-        for tock_id, times in clock.times.items():
-            yield self._formatting_data[None].render(clock, tock_id, times)
+        formatting_data = self._formatting_data.get(
+            clock._tick_id, self._formatting_data[None]
+        )
+        sampling_factor = clock.sampling_factor
+        for thread_name, tock_id, times in self._items(clock):
+            # lines are only formatted again when their times have changed; the
+            # times of a tock in several threads are merged anew at each render,
+            # so a clock that was recreated is detected by its own identity
+            key = (clock._tick_id, tock_id, thread_name)
+            cached = self._lines.get(key)
+            if (
+                cached is not None
+                and cached[0] is formatting_data
+                and cached[1] is clock
+                and cached[2] == times.count
+                and cached[3] == sampling_factor
+                and not formatting_data.volatile
+            ):
+                yield cached[4]
+                continue
+            line = formatting_data.render(clock, tock_id, times, thread_name)
+            self._lines[key] = (
+                formatting_data,
+                clock,
+                times.count,
+                sampling_factor,
+                line,
+            )
+            yield line
+
+    def render_tree(self, tree: "CallTree") -> List[str]:
+        """Render one line per node of the call tree, indented by depth."""
+        return [
+            TREE_FORMAT.format(
+                indent="  " * depth,
+                name=node.name,
+                total=format_ns_interval(node.total_ns, max_terms=self._max_terms),
+                self=format_ns_interval(node.self_ns, max_terms=self._max_terms),
+                count=node.count,
+            )
+            for depth, node in tree.root.walk()
+        ]
@@ -1,15 +1,56 @@
+import functools
 import inspect
-from typing import TYPE_CHECKING, Callable, Optional
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 
 if TYPE_CHECKING:
+    from ticktock.clocks import Clock
     from ticktock.collection import ClockCollection
+    from ticktock.sampling import Sampler
 
+from ticktock import clocks as clocks_module
 from ticktock.clocks import tick
-from ticktock.utils import _TockName, get_frame_info
+from ticktock.utils import _TockName
+
+
+class _NoOpTicktock:
+    """Returned by `ticktock` when disabled: it leaves functions unchanged."""
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *_):
+        pass
+
+    async def __aenter__(self):
+        pass
+
+    async def __aexit__(self, *_):
+        pass
+
+    def __call__(self, func: Callable) -> Callable:
+        return func
+
+
+_NOOP_TICKTOCK = _NoOpTicktock()
+
+# The clocks entered with ticktock context managers are kept per thread and
+# per asyncio task, in a stack of (ticktock, clock, parent) tuples, so that
+# they can be entered concurrently. A single variable is shared by all
+# context managers, so that entering them does not grow the context.
+_ENTERED: ContextVar[Optional[Tuple["ticktock", "Clock", Any]]] = ContextVar(
+    "ticktock", default=None
+)
 
 
 class ticktock:
-    _func: Optional[Callable] = None
+    def __new__(cls, *args, **kwargs) -> Any:
+        if clocks_module._DISABLED:
+            return args[0] if args and callable(args[0]) else _NOOP_TICKTOCK
+        if args and callable(args[0]):
+            # used as a decorator without arguments
+            return cls(**kwargs)._decorate(args[0])
+        return super().__new__(cls)
 
     def __init__(
         self,
@@ -19,53 +60,118 @@ class ticktock:
         timer: Optional[Callable[[], int]] = None,
         enabled: Optional[bool] = None,
         collection: Optional["ClockCollection"] = None,
+        record_nested: bool = True,
+        sampler: Optional["Sampler"] = None,
+        labels: Optional[Dict[str, Any]] = None,
     ) -> None:
-        if args and callable(args[0]):
-            self._func = args[0]
         self._name = name
         self._format = format
         self._timer = timer
         self._collection = collection
         self._enabled = enabled
+        self._record_nested = record_nested
+        self._sampler = sampler
+        self._labels = labels
 
-    def __enter__(self):
-        self.clock = tick(
+    def _enter(self) -> None:
+        clock = tick(
             name=self._name,
             format=self._format,
             timer=self._timer,
             enabled=self._enabled,
             collection=self._collection,
-            frame_info=get_frame_info(1),
+            stacklevel=3,
+            nested=True,
+            record_nested=self._record_nested,
+            sampler=self._sampler,
+            labels=self._labels,
         )
+        _ENTERED.set((self, clock, _ENTERED.get()))
+
+    def _exit(self) -> None:
+        entered = _ENTERED.get()
+        # context managers are exited in reverse order, unless they are
+        # entered and exited by hand
+        above = []
+        while entered is not None and entered[0] is not self:
+            above.append(entered)
+            entered = entered[2]
+        if entered is None:
+            raise ValueError("ticktock context manager was not entered.")
+        _, clock, parent = entered
+        for instance, other_clock, _ in reversed(above):
+            parent = (instance, other_clock, parent)
+        _ENTERED.set(parent)
+        clock.tock(name=_TockName.CONTEXTMANAGER, stacklevel=3, nested=True)
+
+    def __enter__(self):
+        self._enter()
 
     def __exit__(self, *_):
-        self.clock.tock(name=_TockName.CONTEXTMANAGER, frame_info=get_frame_info(1))
-
-    def __call__(self, *args, **kwargs):
-        def _decorate(func):
-            func_n_lines = len(inspect.getsource(func).split("\n")) - 2
-            func_first_lineno = func.__code__.co_firstlineno
-            func_filename = func.__code__.co_filename
-
-            def wrapper(*args, **kwargs):
-                t = tick(
-                    name=self._name or func.__name__,
-                    format=self._format,
-                    timer=self._timer,
-                    enabled=self._enabled,
-                    collection=self._collection,
-                    frame_info=(func_filename, func_first_lineno),
-                )
-                retval = func(*args, **kwargs)
+        self._exit()
+
+    async def __aenter__(self):
+        self._enter()
+
+    async def __aexit__(self, *_):
+        self._exit()
+
+    def __call__(self, func: Callable) -> Callable:
+        return self._decorate(func)
+
+    def _decorate(self, func: Callable) -> Callable:
+        func_n_lines = len(inspect.getsource(func).split("\n")) - 2
+        func_first_lineno = func.__code__.co_firstlineno
+        func_filename = func.__code__.co_filename
+        tick_frame_info = (func_filename, func_first_lineno)
+        tock_frame_info = (func_filename, func_n_lines + func_first_lineno)
+
+        def _tick():
+            return tick(
+                name=self._name or func.__name__,
+                format=self._format,
+                timer=self._timer,
+                enabled=self._enabled,
+                collection=self._collection,
+                frame_info=tick_frame_info,
+                nested=True,
+                record_nested=self._record_nested,
+                sampler=self._sampler,
+                labels=self._labels,
+            )
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                t = _tick()
+                try:
+                    retval = await func(*args, **kwargs)
+                except BaseException:
+                    t._discard_tick()
+                    raise
                 t.tock(
                     name=_TockName.DECORATOR,
-                    frame_info=(func_filename, func_n_lines + func_first_lineno),
+                    frame_info=tock_frame_info,
+                    nested=True,
                 )
                 return retval
 
-            return wrapper
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            t = _tick()
+            try:
+                retval = func(*args, **kwargs)
+            except BaseException:
+                t._discard_tick()
+                raise
+            t.tock(
+                name=_TockName.DECORATOR,
+                frame_info=tock_frame_info,
+                nested=True,
+            )
+            return retval
 
-        if self._func:
-            return _decorate(self._func)(*args, **kwargs)
-        else:
-            return _decorate(args[0])
+        return wrapper
@@ -0,0 +1,138 @@
+import os
+import threading
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from ticktock.clocks import Clock
+
+
+class TreeNode:
+    """The times of a clock when ticked within the clocks of its parents.
+
+    `total_ns` is the time between the ticks and tocks of the clock
+    (inclusive time), and `self_ns` the part of it that was not measured by
+    the clocks ticked within it (exclusive time). Clocks ticked within it
+    that run concurrently, in asyncio tasks for instance, can measure more
+    time than it did, in which case `self_ns` is 0.
+    """
+
+    def __init__(self, clock: Optional["Clock"] = None) -> None:
+        self.clock = clock
+        self.count = 0
+        self.total_ns = 0
+        self.children_ns = 0
+        self.children: Dict[str, "TreeNode"] = {}
+
+    @property
+    def name(self) -> str:
+        if self.clock is None:
+            return ""
+        if self.clock.tick_name:
+            return self.clock.tick_name
+        return f"{os.path.basename(self.clock.tick_filename)}:{self.clock.tick_line}"
+
+    @property
+    def self_ns(self) -> int:
+        return max(self.total_ns - self.children_ns, 0)
+
+    def child(self, clock: "Clock") -> "TreeNode":
+        node = self.children.get(clock._tick_id)
+        if node is None:
+            node = self.children.setdefault(clock._tick_id, TreeNode(clock))
+        return node
+
+    def merge(self, other: "TreeNode") -> None:
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.children_ns += other.children_ns
+        for tick_id, other_child in list(other.children.items()):
+            child = self.children.get(tick_id)
+            if child is None:
+                child = self.children[tick_id] = TreeNode(other_child.clock)
+            child.merge(other_child)
+
+    def walk(self, depth: int = 0) -> Iterator[Tuple[int, "TreeNode"]]:
+        """Iterate over the `(depth, node)` of the descendants of this node."""
+        for child in list(self.children.values()):
+            yield depth, child
+            yield from child.walk(depth + 1)
+
+
+class CallTree:
+    """The clocks of a collection, arranged by the clocks they were ticked in.
+
+    The active clocks are kept per thread and per asyncio task, and each
+    tock is recorded in the node of its clock below the clocks that were
+    active at its tick. Times are recorded per thread, and merged in `root`.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._roots: List[TreeNode] = []
+        # a stack of (node, clock, parent) of the active clocks
+        self._stack: ContextVar[Optional[Tuple[TreeNode, "Clock", Any]]] = ContextVar(
+            "ticktock:tree", default=None
+        )
+
+    def _thread_root(self) -> TreeNode:
+        try:
+            return self._local.root
+        except AttributeError:
+            root = self._local.root = TreeNode()
+            # list.append is atomic, no lock is needed to register the root
+            self._roots.append(root)
+            return root
+
+    @property
+    def root(self) -> TreeNode:
+        """The root of the tree, merged over all threads."""
+        roots = list(self._roots)
+        if len(roots) == 1:
+            return roots[0]
+        root = TreeNode()
+        for thread_root in roots:
+            root.merge(thread_root)
+        return root
+
+    def enter(self, clock: "Clock", nested: bool = False) -> None:
+        """Activate `clock`, within the clocks that are active.
+
+        Without `nested`, a clock that is active already is restarted, and
+        the clocks that were activated since are discarded.
+        """
+        stack = self._stack.get()
+        if not nested:
+            entry = stack
+            while entry is not None:
+                if entry[1] is clock:
+                    self._stack.set(entry)
+                    return
+                entry = entry[2]
+        parent = stack[0] if stack is not None else self._thread_root()
+        self._stack.set((parent.child(clock), clock, stack))
+
+    def exit(self, clock: "Clock", time_ns: Optional[int] = None) -> None:
+        """Deactivate `clock`, recording `time_ns` unless it is None.
+
+        Clocks activated since `clock`, and not deactivated, are discarded.
+        """
+        entry = self._stack.get()
+        while entry is not None and entry[1] is not clock:
+            entry = entry[2]
+        if entry is None:
+            return
+        node, _, parent = entry
+        self._stack.set(parent)
+        if time_ns is None:
+            return
+        node.count += 1
+        node.total_ns += time_ns
+        if parent is not None:
+            parent[0].children_ns += time_ns
+        else:
+            self._thread_root().children_ns += time_ns
+
+    def clear(self) -> None:
+        self._local = threading.local()
+        self._roots = []
@@ -1,7 +1,16 @@
 import inspect
 import os
+import sys
 from enum import Enum
-from typing import Tuple
+from typing import Dict, Hashable, Optional, Tuple
+
+CallSite = Tuple[str, str, int]
+# the labels of a measurement, as (name, value) pairs
+LabelSet = Tuple[Tuple[str, str], ...]
+# the value of all labels of the label sets beyond the limit of a clock
+OTHER_LABEL = "other"
+# label names used by the renderers, which are renamed with a "label_" prefix
+RESERVED_LABELS = {"name", "quantile"}
 
 time_factors = [
     (24 * 60 * 60 * 1e9, "d"),
@@ -28,6 +37,10 @@ def format_ns_interval(v_ns: float, max_terms: int = 2):
     return out_str
 
 
+def format_labels(labels: LabelSet) -> str:
+    return ",".join(f"{name}={value}" for name, value in labels)
+
+
 def value_from_env(env_var: str, default):
     if env_var in os.environ:
         return type(default)(os.environ[env_var])
@@ -51,6 +64,34 @@ def get_frame_info(level: int = 1) -> Tuple[str, int]:
         return "<no frame info>", -1
 
 
+def get_call_site(
+    cache: Dict[Hashable, CallSite],
+    frame_info: Optional[Tuple[str, int]] = None,
+    level: int = 1,
+) -> CallSite:
+    """Resolve the ``(id, filename, line)`` of a call site, memoized in ``cache``.
+
+    Without ``frame_info``, the site is keyed on the caller's code object and
+    instruction offset, so that repeated calls from the same place skip
+    building frame info and formatting the ``"filename:line"`` id.
+    """
+    if frame_info is None:
+        try:
+            frame = sys._getframe(level + 1)
+        except ValueError:
+            return "<no frame info>:-1", "<no frame info>", -1
+        key: Hashable = (frame.f_code, frame.f_lasti)
+        site = cache.get(key)
+        if site is None:
+            filename, line = frame.f_code.co_filename, frame.f_lineno
+            site = cache[key] = (f"{filename}:{line}", filename, line)
+        return site
+    site = cache.get(frame_info)
+    if site is None:
+        site = cache[frame_info] = ("{}:{}".format(*frame_info), *frame_info)
+    return site
+
+
 class _TockName(Enum):
     DECORATOR = 1
     CONTEXTMANAGER = 2